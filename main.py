@@ -1,7 +1,10 @@
+import argparse
 import cv2
+import numpy as np
 import sys
 import os
 import subprocess
+import time
 
 # Add the current directory to sys.path to ensure modules can be imported
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -10,6 +13,16 @@ from modules.drawing import DrawingMode
 from modules.hand_control import HandControlMode
 from modules.eye_control import EyeControlMode
 from modules.face_detection import FaceDetectionMode
+from modules.capture import BACKENDS, FOURCCS, CaptureConfig, is_camera, list_cameras
+from modules.face_service import FaceInferenceService
+from modules.frame_source import open_source
+from modules.head_pose import DEFAULT_CALIBRATION_PATH
+from modules.input_dispatcher import InputDispatcher
+from modules.mode_registry import ModeRegistry
+from modules.pipeline import FramePipeline
+from modules.profiler import profiler
+from modules.recording import LandmarkRecorder
+from modules.ui import OverlayCache
 
 def check_and_download_models():
     """Checks if models exist, if not, runs the download script."""
@@ -40,83 +53,212 @@ def check_and_download_models():
     else:
         print("All models verified.")
 
-def main():
-    check_and_download_models()
+def parse_args():
+    parser = argparse.ArgumentParser(description="Gesture Control & Virtual Drawing")
+    parser.add_argument("--source", default="0",
+                        help="Camera index or device (/dev/video2), video file or image directory/glob to replay (default: camera 0)")
+    parser.add_argument("--backend", choices=tuple(BACKENDS), default="auto",
+                        help="Camera capture backend (default: OpenCV's choice)")
+    parser.add_argument("--fourcc", choices=FOURCCS,
+                        help="Camera pixel format. MJPG usually allows higher fps than YUYV at the same size")
+    parser.add_argument("--width", type=int, default=1280, help="Camera frame width (default: 1280)")
+    parser.add_argument("--height", type=int, default=720, help="Camera frame height (default: 720)")
+    parser.add_argument("--fps", type=float, help="Camera frame rate to ask for")
+    parser.add_argument("--list-cameras", action="store_true", help="Print the cameras that can be opened and exit")
+    parser.add_argument("--live-stream", action="store_true",
+                        help="Run hand/eye landmarkers asynchronously (MediaPipe LIVE_STREAM mode)")
+    parser.add_argument("--roi", action="store_true",
+                        help="Crop hand/face inference around the previous detection and adapt its resolution")
+    parser.add_argument("--frame-budget-ms", type=float, default=33,
+                        help="Inference time budget used by --roi to lower the input resolution")
+    parser.add_argument("--cursor-rate", type=float, default=120,
+                        help="Cursor update rate in Hz (interpolated between camera frames)")
+    parser.add_argument("--idle-timeout", type=float, default=300,
+                        help="Unload modes unused for this many seconds (0 keeps them loaded)")
+    parser.add_argument("--record", metavar="PATH",
+                        help="Save hand/face landmarker results to a recording for replay (see tools/benchmark.py --recording)")
+    parser.add_argument("--hud", action="store_true",
+                        help="Show fps, dropped frames and per-stage timings on screen (toggle with 'h')")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Record every timed stage and write a trace on exit (.csv, or Chrome trace .json)")
+    parser.add_argument("--trace-format", choices=("chrome", "json", "csv"),
+                        help="Trace format (default: from the --trace file extension)")
+    parser.add_argument("--no-warm-up", action="store_true",
+                        help="Don't preload the most used modes while the menu is showing")
+    parser.add_argument("--face-mesh", action="store_true",
+                        help="Draw the full face mesh in face detection mode instead of the point cloud")
+    parser.add_argument("--release-camera", action="store_true",
+                        help="Close the camera while the menu is showing (camera light off, slower to resume)")
+    parser.add_argument("--no-face-clicks", action="store_true",
+                        help="Don't click with winks / facial gestures in eye control mode")
+    parser.add_argument("--eye-pointer", choices=("pose", "nose"), default="pose",
+                        help="Eye control cursor: calibrated head pose + iris (default) or nose tip position")
+    parser.add_argument("--calibration", default=DEFAULT_CALIBRATION_PATH, metavar="PATH",
+                        help="Head pose calibration file, loaded at startup and written by 'c' in eye control")
+    return parser.parse_args()
+
+def render_menu(canvas):
+    """Draws the main menu (cached as a sprite, see OverlayCache)"""
+    h, w = canvas.shape[:2]
+    x1_start, x1_end, y1_start, y1_end, x2_start, x2_end, y2_start, y2_end, \
+        x3_start, x3_end, y3_start, y3_end, x4_start, x4_end, y4_start, y4_end, \
+        x5_start, x5_end, y5_start, y5_end = menu_layout(w, h)
 
-    cap = cv2.VideoCapture(0)
+    # Draw Menu Background
+    cv2.rectangle(canvas, (0, 0), (w, h), (20, 20, 20), -1)
+    
+    # Title
+    title = "Gesture Control App"
+    title_size = cv2.getTextSize(title, cv2.FONT_HERSHEY_SIMPLEX, 1.5, 3)[0]
+    cv2.putText(canvas, title, (w//2 - title_size[0]//2, int(h * 0.1)), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 3)
+    
+    # Button 1: Drawing Mode
+    cv2.rectangle(canvas, (x1_start, y1_start), (x1_end, y1_end), (89, 222, 255), -1)
+    cv2.putText(canvas, "Drawing Mode", (x1_start + 20, y1_start + 60), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
+    
+    # Button 2: Hand Control
+    cv2.rectangle(canvas, (x2_start, y2_start), (x2_end, y2_end), (128, 0, 255), -1)
+    cv2.putText(canvas, "Hand Control", (x2_start + 20, y2_start + 60), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
     
-    # Increase resolution for better UI
-    cap.set(3, 1280)
-    cap.set(4, 720)
+    # Button 3: Eye Control
+    cv2.rectangle(canvas, (x3_start, y3_start), (x3_end, y3_end), (0, 255, 0), -1)
+    cv2.putText(canvas, "Eye Control", (x3_start + 40, y3_start + 60), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
 
-    drawing_mode = DrawingMode()
+    # Button 4: Face Detection
+    cv2.rectangle(canvas, (x4_start, y4_start), (x4_end, y4_end), (255, 100, 100), -1)
+    cv2.putText(canvas, "Face Tech", (x4_start + 40, y4_start + 60), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
     
-    try:
-        hand_control_mode = HandControlMode()
-    except Exception as e:
-        print(f"Error initializing hand control: {e}")
-        hand_control_mode = None
-        
-    try:
-        eye_control_mode = EyeControlMode()
-    except Exception as e:
-        print(f"Error initializing eye control: {e}")
-        eye_control_mode = None
-
-    try:
-        face_detection_mode = FaceDetectionMode()
-    except Exception as e:
-        print(f"Error initializing face detection: {e}")
-        face_detection_mode = None
+    # Button 5: Exit
+    cv2.rectangle(canvas, (x5_start, y5_start), (x5_end, y5_end), (0, 0, 255), -1)
+    cv2.putText(canvas, "Exit", (x5_start + 60, y5_start + 40), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+
+def render_menu_hint(canvas):
+    h, w = canvas.shape[:2]
+    cv2.putText(canvas, "Press 'm' for Menu", (w - 200, h - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+
+def menu_layout(w, h):
+    """Button rectangles of the menu, shared by drawing and click handling"""
+    # Row 1: Drawing Mode (Left), Hand Control (Right)
+    x1_start, x1_end = int(w * 0.1), int(w * 0.4)
+    y1_start, y1_end = int(h * 0.2), int(h * 0.35)
+    x2_start, x2_end = int(w * 0.6), int(w * 0.9)
+    y2_start, y2_end = int(h * 0.2), int(h * 0.35)
+    # Row 2: Eye Control (Left), Face Detection (Right)
+    x3_start, x3_end = int(w * 0.1), int(w * 0.4)
+    y3_start, y3_end = int(h * 0.45), int(h * 0.6)
+    x4_start, x4_end = int(w * 0.6), int(w * 0.9)
+    y4_start, y4_end = int(h * 0.45), int(h * 0.6)
+    # Row 3: Exit (Bottom)
+    x5_start, x5_end = int(w * 0.4), int(w * 0.6)
+    y5_start, y5_end = int(h * 0.8), int(h * 0.9)
+    return (x1_start, x1_end, y1_start, y1_end, x2_start, x2_end, y2_start, y2_end,
+            x3_start, x3_end, y3_start, y3_end, x4_start, x4_end, y4_start, y4_end,
+            x5_start, x5_end, y5_start, y5_end)
+
+def draw_loading(frame, label):
+    """Placeholder shown while a mode is still being built in the background"""
+    cv2.putText(frame, f"Loading {label}...", (10, 440), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+
+def main():
+    args = parse_args()
+    # Device, backend, pixel format, size and fps of the camera
+    capture = CaptureConfig(args.source, backend=args.backend, fourcc=args.fourcc,
+                            width=args.width, height=args.height, fps=args.fps)
+    if args.list_cameras:
+        cameras = list_cameras(capture)
+        for device, description in cameras:
+            print(f"Camera {device}: {description}")
+        if not cameras:
+            print("No cameras found")
+        return
+    check_and_download_models()
+
+    def open_camera():
+        return open_source(args.source, capture=capture)
+
+    cap = open_camera()
+    # The menu is drawn without the camera, at the camera's resolution
+    menu_size = (int(cap.get(3)) or 1280, int(cap.get(4)) or 720)
+
+    # Modes are built the first time they are selected (see ModeRegistry).
+    # One face landmarker is shared by gaze safety, eye control and face detection.
+    # Before anything was picked, warm up the modes that need a model (slowest to build)
+    registry = ModeRegistry(idle_timeout=args.idle_timeout, default_order=("CONTROL", "EYE_CONTROL", "FACE_DETECTION"))
+    # Mouse input is sent from its own thread so a slow desktop can't stall vision
+    input_dispatcher = InputDispatcher()
+    recorder = LandmarkRecorder(args.record, (cap.get(3), cap.get(4))) if args.record else None
+    # Menu and hints are static: rendered once per window size, then one copy per frame
+    overlays = OverlayCache()
+
+    def build_face_service():
+        # Gaze safety and eye control need one face; face detection asks for more while selected
+        service = FaceInferenceService(num_faces=1, live_stream=args.live_stream,
+                                       roi=args.roi, frame_budget_ms=args.frame_budget_ms)
+        service.recorder = recorder
+        return service
+
+    def build_hand_control():
+        return HandControlMode(live_stream=args.live_stream, face_service=registry.get("FACE_SERVICE"),
+                               roi=args.roi, frame_budget_ms=args.frame_budget_ms, input_dispatcher=input_dispatcher, cursor_rate_hz=args.cursor_rate,
+                               recorder=recorder)
+
+    registry.register("FACE_SERVICE", build_face_service)
+    registry.register("DRAWING", DrawingMode)
+    registry.register("CONTROL", build_hand_control, depends=("FACE_SERVICE",))
+    registry.register("EYE_CONTROL", lambda: EyeControlMode(live_stream=args.live_stream, face_service=registry.get("FACE_SERVICE"),
+                                                            input_dispatcher=input_dispatcher, cursor_rate_hz=args.cursor_rate,
+                                                            face_clicks=not args.no_face_clicks, pointer=args.eye_pointer,
+                                                            calibration_path=args.calibration),
+                      depends=("FACE_SERVICE",))
+    registry.register("FACE_DETECTION", lambda: FaceDetectionMode(face_service=registry.get("FACE_SERVICE"), tessellation=args.face_mesh),
+                      depends=("FACE_SERVICE",))
     
     # App State
     current_mode = "MENU" # MENU, DRAWING, CONTROL, EYE_CONTROL, FACE_DETECTION
+    menu_dirty = True # The menu is only redrawn when something on it changes
+    quit_requested = False # Exit button: leave the render loop so cleanup still runs
+
+    def select_mode(mode):
+        nonlocal current_mode, menu_dirty
+        current_mode = mode
+        registry.activate(mode) # Modes hold on to extra face outputs only while selected
+        if mode == "MENU":
+            menu_dirty = True
+            # Preload what the user is likely to pick next while they look at the menu
+            if not args.no_warm_up:
+                registry.warm_up(registry.likely_next())
+        else:
+            registry.mark_selected(mode)
+            registry.get_nowait(mode) # Start building right away
+
+    select_mode("MENU") # Starts in the menu, which also starts the warm-up
     
     # Mouse Callback for Menu
     def menu_callback(event, x, y, flags, param):
-        nonlocal current_mode
-        w = int(cap.get(3))
-        h = int(cap.get(4))
-        
-        # Calculate dynamic button positions
-        # Row 1
-        # Button 1: Drawing Mode (Left)
-        x1_start, x1_end = int(w * 0.1), int(w * 0.4)
-        y1_start, y1_end = int(h * 0.2), int(h * 0.35)
-        
-        # Button 2: Hand Control (Right)
-        x2_start, x2_end = int(w * 0.6), int(w * 0.9)
-        y2_start, y2_end = int(h * 0.2), int(h * 0.35)
+        nonlocal quit_requested
+        w, h = menu_size
         
-        # Row 2
-        # Button 3: Eye Control (Left)
-        x3_start, x3_end = int(w * 0.1), int(w * 0.4)
-        y3_start, y3_end = int(h * 0.45), int(h * 0.6)
-
-        # Button 4: Face Detection (Right - NEW)
-        x4_start, x4_end = int(w * 0.6), int(w * 0.9)
-        y4_start, y4_end = int(h * 0.45), int(h * 0.6)
-        
-        # Row 3
-        # Button 5: Exit (Bottom)
-        x5_start, x5_end = int(w * 0.4), int(w * 0.6)
-        y5_start, y5_end = int(h * 0.8), int(h * 0.9)
+        # Same layout render_menu draws
+        x1_start, x1_end, y1_start, y1_end, x2_start, x2_end, y2_start, y2_end, \
+            x3_start, x3_end, y3_start, y3_end, x4_start, x4_end, y4_start, y4_end, \
+            x5_start, x5_end, y5_start, y5_end = menu_layout(w, h)
 
         if current_mode == "MENU" and event == cv2.EVENT_LBUTTONDOWN:
             if x1_start < x < x1_end and y1_start < y < y1_end:
-                current_mode = "DRAWING"
+                select_mode("DRAWING")
             elif x2_start < x < x2_end and y2_start < y < y2_end:
-                current_mode = "CONTROL"
+                select_mode("CONTROL")
             elif x3_start < x < x3_end and y3_start < y < y3_end:
-                current_mode = "EYE_CONTROL"
+                select_mode("EYE_CONTROL")
             elif x4_start < x < x4_end and y4_start < y < y4_end:
-                current_mode = "FACE_DETECTION"
+                select_mode("FACE_DETECTION")
             elif x5_start < x < x5_end and y5_start < y < y5_end:
-                sys.exit()
+                quit_requested = True
         
         elif current_mode == "DRAWING" and event == cv2.EVENT_LBUTTONDOWN:
+            drawing_mode = registry.get_nowait("DRAWING")
             if drawing_mode:
-                drawing_mode.handle_click(x, y)
+                drawing_mode.handle_click(x, y, add=bool(flags & cv2.EVENT_FLAG_SHIFTKEY))
 
     cv2.namedWindow('Gesture App')
     cv2.setMouseCallback('Gesture App', menu_callback)
@@ -124,106 +266,143 @@ def main():
     print("Application Started")
     print("Press 'ESC' to exit")
     print("Press 'm' to return to menu")
+    print("Press 'h' to toggle the performance HUD")
+    print("Press 'c' in eye control to calibrate the head pose cursor")
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-            
-        frame = cv2.flip(frame, 1)
+    # Runs on the pipeline's inference thread (frames arrive already mirrored)
+    def process_frame(frame, timestamp_ms, frame_id):
         h, w, _ = frame.shape
 
-        if current_mode == "MENU":
-            # Dynamic Layout
-            x1_start, x1_end = int(w * 0.1), int(w * 0.4)
-            y1_start, y1_end = int(h * 0.2), int(h * 0.35)
-            
-            x2_start, x2_end = int(w * 0.6), int(w * 0.9)
-            y2_start, y2_end = int(h * 0.2), int(h * 0.35)
-            
-            x3_start, x3_end = int(w * 0.1), int(w * 0.4)
-            y3_start, y3_end = int(h * 0.45), int(h * 0.6)
-
-            x4_start, x4_end = int(w * 0.6), int(w * 0.9)
-            y4_start, y4_end = int(h * 0.45), int(h * 0.6)
-            
-            x5_start, x5_end = int(w * 0.4), int(w * 0.6)
-            y5_start, y5_end = int(h * 0.8), int(h * 0.9)
-
-            # Draw Menu Background
-            cv2.rectangle(frame, (0, 0), (w, h), (20, 20, 20), -1)
-            
-            # Title
-            title = "Gesture Control App"
-            title_size = cv2.getTextSize(title, cv2.FONT_HERSHEY_SIMPLEX, 1.5, 3)[0]
-            cv2.putText(frame, title, (w//2 - title_size[0]//2, int(h * 0.1)), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 3)
-            
-            # Button 1: Drawing Mode
-            cv2.rectangle(frame, (x1_start, y1_start), (x1_end, y1_end), (89, 222, 255), -1)
-            cv2.putText(frame, "Drawing Mode", (x1_start + 20, y1_start + 60), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
-            
-            # Button 2: Hand Control
-            cv2.rectangle(frame, (x2_start, y2_start), (x2_end, y2_end), (128, 0, 255), -1)
-            cv2.putText(frame, "Hand Control", (x2_start + 20, y2_start + 60), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
-            
-            # Button 3: Eye Control
-            cv2.rectangle(frame, (x3_start, y3_start), (x3_end, y3_end), (0, 255, 0), -1)
-            cv2.putText(frame, "Eye Control", (x3_start + 40, y3_start + 60), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
+        # Unloading happens here, on the thread that runs the modes
+        registry.release_idle(keep=(current_mode,))
 
-            # Button 4: Face Detection
-            cv2.rectangle(frame, (x4_start, y4_start), (x4_end, y4_end), (255, 100, 100), -1)
-            cv2.putText(frame, "Face Tech", (x4_start + 40, y4_start + 60), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
-            
-            # Button 5: Exit
-            cv2.rectangle(frame, (x5_start, y5_start), (x5_end, y5_end), (0, 0, 255), -1)
-            cv2.putText(frame, "Exit", (x5_start + 60, y5_start + 40), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+        if current_mode == "MENU":
+            # Normally capture is paused in the menu; this covers a frame caught mid-switch
+            overlays.draw(frame, "menu", render_menu)
 
         elif current_mode == "DRAWING":
-            frame = drawing_mode.process(frame)
-            cv2.putText(frame, "Press 'm' for Menu", (w - 200, h - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+            drawing_mode = registry.get_nowait("DRAWING")
+            if drawing_mode:
+                frame = drawing_mode.process(frame)
+            else:
+                draw_loading(frame, "Drawing Mode")
+            overlays.draw(frame, "menu_hint", render_menu_hint)
             
         elif current_mode == "CONTROL":
+            hand_control_mode = registry.get_nowait("CONTROL")
             if hand_control_mode:
                 try:
-                    frame = hand_control_mode.process(frame)
+                    frame = hand_control_mode.process(frame, timestamp_ms, frame_id)
                 except Exception as e:
                     print(f"Runtime error in hand control: {e}")
+            elif not registry.failed("CONTROL"):
+                draw_loading(frame, "Hand Control")
             else:
                  cv2.putText(frame, "Hand Control Disabled (Error)", (10, 440), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
             
-            cv2.putText(frame, "Press 'm' for Menu", (w - 200, h - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+            overlays.draw(frame, "menu_hint", render_menu_hint)
             
         elif current_mode == "EYE_CONTROL":
+            eye_control_mode = registry.get_nowait("EYE_CONTROL")
             if eye_control_mode:
                 try:
-                    frame = eye_control_mode.process(frame)
+                    frame = eye_control_mode.process(frame, timestamp_ms, frame_id)
                 except Exception as e:
                     print(f"Runtime error in eye control: {e}")
+            elif not registry.failed("EYE_CONTROL"):
+                draw_loading(frame, "Eye Control")
             else:
                  cv2.putText(frame, "Eye Control Disabled (Error)", (10, 440), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
             
-            cv2.putText(frame, "Press 'm' for Menu", (w - 200, h - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+            overlays.draw(frame, "menu_hint", render_menu_hint)
 
         elif current_mode == "FACE_DETECTION":
+            face_detection_mode = registry.get_nowait("FACE_DETECTION")
             if face_detection_mode:
                 try:
-                    frame = face_detection_mode.process(frame)
+                    frame = face_detection_mode.process(frame, timestamp_ms, frame_id)
                 except Exception as e:
                     print(f"Runtime error in face detection: {e}")
+            elif not registry.failed("FACE_DETECTION"):
+                draw_loading(frame, "Face Detection")
             else:
                  cv2.putText(frame, "Face Detection Disabled (Error)", (10, 440), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
             
-            cv2.putText(frame, "Press 'm' for Menu", (w - 200, h - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+            overlays.draw(frame, "menu_hint", render_menu_hint)
+
+        return frame
+
+    # While the menu shows, capture is paused and the inference thread only
+    # unloads idle modes. Only cameras are released: a video would lose its place.
+    camera = is_camera(args.source)
+    pipeline = FramePipeline(cap, process_frame, reporters=[input_dispatcher.stats_line],
+                             reopen=open_camera if args.release_camera and camera else None,
+                             idle_fn=lambda: registry.release_idle(keep=(current_mode,)))
+    profiler.tracing = bool(args.trace)
+    show_hud = args.hud
+    pipeline.pause() # Starts in the menu
+    pipeline.start()
+
+    # Render stage: HighGUI calls must stay on the main thread
+    while pipeline.running and not quit_requested:
+        if current_mode == "MENU":
+            # No camera, no inference: draw once, then just wait for clicks / keys
+            if not pipeline.paused:
+                pipeline.pause()
+            if menu_dirty:
+                menu_frame = np.zeros((menu_size[1], menu_size[0], 3), dtype=np.uint8)
+                overlays.draw(menu_frame, "menu", render_menu)
+                if show_hud:
+                    profiler.draw_hud(menu_frame)
+                cv2.imshow('Gesture App', menu_frame)
+                menu_dirty = False
+            k = cv2.waitKey(50)
+            if k == 27: # ESC
+                break
+            elif k == ord('h'):
+                show_hud = not show_hud
+                menu_dirty = True
+            continue
+
+        if pipeline.paused:
+            pipeline.resume()
+        packet = pipeline.next_frame()
+        if packet is None:
+            continue
 
-        cv2.imshow('Gesture App', frame)
+        render_start = time.perf_counter()
+        if show_hud:
+            with profiler.stage("render.hud"):
+                profiler.draw_hud(packet.image, fps=pipeline.fps)
+        with profiler.stage("render.imshow"):
+            cv2.imshow('Gesture App', packet.image)
+        with profiler.stage("render.waitKey"):
+            k = cv2.waitKey(1)
+        pipeline.mark_rendered(packet, render_start)
 
-        k = cv2.waitKey(1)
         if k == 27: # ESC
             break
         elif k == ord('m'):
-            current_mode = "MENU"
+            select_mode("MENU")
+        elif k == ord('h'):
+            show_hud = not show_hud
+        elif k != -1:
+            # Mode specific keys, e.g. 'c' calibrates eye control
+            mode = registry.get_nowait(current_mode)
+            if mode and hasattr(mode, "handle_key"):
+                mode.handle_key(k)
 
-    cap.release()
+    pipeline.stop()
+    if pipeline.cap is not None:
+        pipeline.cap.release()
+    registry.close_all()
+    input_dispatcher.close()
+    if recorder:
+        recorder.close()
+        print(f"Recorded {recorder.frames} frames to {recorder.path}")
+    if args.trace:
+        count = profiler.export(args.trace, args.trace_format)
+        print(f"Wrote {count} trace events to {args.trace}")
     cv2.destroyAllWindows()
 
 if __name__ == "__main__":
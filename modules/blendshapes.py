@@ -0,0 +1,126 @@
+import numpy as np
+
+# Blendshape channels the detector watches, and their typical fully-on score
+CHANNELS = ("eyeBlinkLeft", "eyeBlinkRight", "jawOpen", "browInnerUp")
+DEFAULT_PEAKS = (0.7, 0.7, 0.6, 0.6)
+BLINK_LEFT, BLINK_RIGHT, JAW_OPEN, BROWS_UP = range(len(CHANNELS))
+
+# Face events: (name, channel, channel that must stay at rest meanwhile or None)
+EVENTS = (
+    ("wink_left", BLINK_LEFT, BLINK_RIGHT), # A normal blink closes both eyes: not a wink
+    ("wink_right", BLINK_RIGHT, BLINK_LEFT),
+    ("mouth_open", JAW_OPEN, None),
+    ("brows_up", BROWS_UP, None),
+)
+
+
+def blendshape_scores(categories, names=CHANNELS):
+    """Scores of the named blendshapes from one face's Category list (0 when missing)"""
+    by_name = {c.category_name: c.score for c in categories}
+    return np.array([by_name.get(name, 0.0) for name in names], dtype=np.float32)
+
+
+def rotation_angle_deg(a, b):
+    """Angle (degrees) of the rotation between two 3x3 rotation matrices"""
+    cos = (np.trace(a.T @ b) - 1) / 2
+    return float(np.degrees(np.arccos(np.clip(cos, -1.0, 1.0))))
+
+
+class BlendshapeEventDetector:
+    """
+    Turns per-frame blendshape scores into face events: winks, mouth open,
+    brows up. update() returns (event, "down" | "up") pairs like GestureEngine,
+    on the very frame a score crosses its threshold.
+
+    Thresholds adapt to the user: each channel keeps a resting baseline (slow
+    average while the feature is at rest) and a peak (average of the highest
+    score of past activations). A channel turns on at on_ratio of the way
+    from baseline to peak and off again below off_ratio (hysteresis).
+
+    New events are suppressed while the head turns faster than
+    max_head_speed (deg/s, from the facial transformation matrix) and for
+    settle_ms afterwards: a moving head smears blendshapes. Each event also
+    waits cooldown_ms before it can fire again (debounce).
+    """
+
+    def __init__(self, on_ratio=0.5, off_ratio=0.3, min_range=0.25, baseline_rate=0.02, peak_rate=0.3,
+                 cooldown_ms=400, max_head_speed=60.0, settle_ms=150):
+        self.on_ratio = on_ratio
+        self.off_ratio = off_ratio
+        self.min_range = min_range # Peak is kept at least this far above the baseline
+        self.baseline_rate = baseline_rate
+        self.peak_rate = peak_rate
+        self.cooldown_ms = cooldown_ms
+        self.max_head_speed = max_head_speed
+        self.settle_ms = settle_ms
+        self.reset()
+
+    def reset(self):
+        n = len(CHANNELS)
+        self.baseline = np.zeros(n, dtype=np.float32)
+        self.peak = np.array(DEFAULT_PEAKS, dtype=np.float32)
+        self.on = np.zeros(n, dtype=bool)
+        self._current_peak = np.zeros(n, dtype=np.float32)
+        self._active = set() # Events that sent "down" and wait for their "up"
+        self._last_down = {}
+        self._last_rotation = None
+        self._last_ts = None
+        self._suppressed_until = -1
+        self.head_speed = 0.0
+
+    @property
+    def thresholds(self):
+        """(on, off) score thresholds per channel"""
+        span = np.maximum(self.peak - self.baseline, self.min_range)
+        return self.baseline + self.on_ratio * span, self.baseline + self.off_ratio * span
+
+    def _head_moving(self, matrix, ts):
+        if matrix is None:
+            return False
+        rotation = np.asarray(matrix, dtype=np.float32)[:3, :3]
+        if not rotation.any():
+            return False # Recording made without matrixes
+        if self._last_rotation is not None and ts > self._last_ts:
+            self.head_speed = rotation_angle_deg(self._last_rotation, rotation) * 1000 / (ts - self._last_ts)
+        self._last_rotation = rotation
+        self._last_ts = ts
+        if self.head_speed > self.max_head_speed:
+            self._suppressed_until = ts + self.settle_ms
+        return ts < self._suppressed_until
+
+    def update(self, scores, ts, matrix=None):
+        """scores: CHANNELS scores (see blendshape_scores), ts: frame time in ms, matrix: 4x4 face transform"""
+        scores = np.asarray(scores, dtype=np.float32)
+        on_at, off_at = self.thresholds
+        moving = self._head_moving(matrix, ts)
+
+        was_on = self.on
+        self.on = np.where(was_on, scores >= off_at, scores >= on_at)
+
+        # Learn: finished activations move the peak, resting scores move the baseline
+        released = was_on & ~self.on
+        if released.any():
+            finished_peak = np.maximum(self._current_peak, self.baseline + self.min_range)
+            self.peak = np.where(released, self.peak + self.peak_rate * (finished_peak - self.peak), self.peak)
+        self._current_peak = np.where(self.on, np.maximum(self._current_peak, scores), 0)
+        if not moving:
+            resting = ~self.on
+            self.baseline += np.where(resting, self.baseline_rate * (scores - self.baseline), 0)
+
+        events = []
+        for name, channel, at_rest in EVENTS:
+            if name in self._active:
+                if not self.on[channel]:
+                    self._active.discard(name)
+                    events.append((name, "up"))
+                continue
+            if not self.on[channel] or was_on[channel] or moving:
+                continue # Only the rising edge can start an event
+            if at_rest is not None and scores[at_rest] >= off_at[at_rest]:
+                continue
+            if ts - self._last_down.get(name, -self.cooldown_ms) < self.cooldown_ms:
+                continue
+            self._active.add(name)
+            self._last_down[name] = ts
+            events.append((name, "down"))
+        return events
@@ -0,0 +1,167 @@
+import os
+import sys
+import threading
+
+import cv2
+import numpy as np
+
+# --backend names -> OpenCV capture API
+BACKENDS = {
+    "auto": cv2.CAP_ANY,
+    "v4l2": cv2.CAP_V4L2,
+    "gstreamer": cv2.CAP_GSTREAMER,
+    "dshow": cv2.CAP_DSHOW,
+    "msmf": cv2.CAP_MSMF,
+    "avfoundation": cv2.CAP_AVFOUNDATION,
+}
+FOURCCS = ("MJPG", "YUYV")
+
+
+def is_camera(source):
+    """Camera index ("0", 1) or a V4L2 device path (/dev/video2)"""
+    return isinstance(source, int) or str(source).isdigit() or str(source).startswith("/dev/video")
+
+
+def fourcc_name(value):
+    code = int(value)
+    return "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4)).strip("\0") or "?"
+
+
+class CaptureConfig:
+    """
+    How to open a camera: device, capture backend, pixel format, size and fps.
+
+    fourcc picks the camera's pixel format: MJPG is compressed, so USB
+    cameras usually reach 60 fps at 720p with it, while raw YUYV often tops
+    out at 30 (or less) at the same size. None keeps the driver's default.
+    """
+
+    def __init__(self, device=0, backend="auto", fourcc=None, width=1280, height=720, fps=None, buffer_size=1):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown capture backend {backend}, expected one of {', '.join(BACKENDS)}")
+        self.device = device
+        self.backend = backend
+        self.fourcc = fourcc.upper() if fourcc else None
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.buffer_size = buffer_size # Frames queued in the driver; 1 keeps latency low
+
+    @property
+    def device_path(self):
+        device = str(self.device)
+        return f"/dev/video{device}" if device.isdigit() else device
+
+    def gstreamer_pipeline(self):
+        """GStreamer launch string for a V4L2 camera, ending in an appsink OpenCV reads BGR frames from"""
+        caps = []
+        if self.width and self.height:
+            caps.append(f"width={self.width},height={self.height}")
+        if self.fps:
+            caps.append(f"framerate={int(self.fps)}/1")
+        caps = "".join("," + c for c in caps)
+        if self.fourcc == "MJPG":
+            source = f"image/jpeg{caps} ! jpegdec"
+        elif self.fourcc == "YUYV":
+            source = f"video/x-raw,format=YUY2{caps}"
+        else:
+            source = f"video/x-raw{caps}"
+        return (f"v4l2src device={self.device_path} ! {source} ! videoconvert ! video/x-raw,format=BGR ! "
+                f"appsink drop=true max-buffers=1 sync=false")
+
+    def describe(self):
+        fmt = self.fourcc or "default format"
+        fps = f" @ {self.fps:g} fps" if self.fps else ""
+        return f"camera {self.device} ({self.backend}): {self.width}x{self.height} {fmt}{fps}"
+
+
+def open_camera(config, device=None):
+    """
+    Opens a camera as configured and reports what the driver actually
+    negotiated (a camera silently falls back when it can't do a format).
+    device overrides config.device.
+    """
+    if device is not None:
+        config = CaptureConfig(device, config.backend, config.fourcc, config.width, config.height,
+                               config.fps, config.buffer_size)
+
+    if config.backend == "gstreamer":
+        cap = cv2.VideoCapture(config.gstreamer_pipeline(), cv2.CAP_GSTREAMER)
+    else:
+        device = int(config.device) if str(config.device).isdigit() else config.device
+        cap = cv2.VideoCapture(device, BACKENDS[config.backend])
+        if cap.isOpened():
+            # The pixel format has to be set before the size, V4L2 picks sizes per format
+            if config.fourcc:
+                cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*config.fourcc))
+            if config.width and config.height:
+                cap.set(cv2.CAP_PROP_FRAME_WIDTH, config.width)
+                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, config.height)
+            if config.fps:
+                cap.set(cv2.CAP_PROP_FPS, config.fps)
+            if config.buffer_size:
+                cap.set(cv2.CAP_PROP_BUFFERSIZE, config.buffer_size)
+
+    if not cap.isOpened():
+        print(f"Could not open {config.describe()}")
+        return cap
+
+    fourcc = fourcc_name(cap.get(cv2.CAP_PROP_FOURCC))
+    print(f"Opened {config.describe()} -> {int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))}x"
+          f"{int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))} {fourcc} @ {cap.get(cv2.CAP_PROP_FPS):g} fps")
+    if config.fourcc and config.backend != "gstreamer" and fourcc != config.fourcc:
+        print(f"Warning: camera {config.device} doesn't do {config.fourcc}, using {fourcc}")
+    return cap
+
+
+def list_cameras(config, max_index=10):
+    """Probes camera indices 0..max_index-1 (or /dev/video* on Linux). Returns (device, description) pairs."""
+    devices = range(max_index)
+    if sys.platform.startswith("linux") and os.path.isdir("/dev"):
+        devices = sorted(int(name[5:]) for name in os.listdir("/dev") if name.startswith("video") and name[5:].isdigit())
+
+    found = []
+    for device in devices:
+        cap = cv2.VideoCapture(device, BACKENDS[config.backend] if config.backend != "gstreamer" else cv2.CAP_ANY)
+        if cap.isOpened():
+            found.append((device, f"{int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))}x{int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))} "
+                                  f"{fourcc_name(cap.get(cv2.CAP_PROP_FOURCC))} @ {cap.get(cv2.CAP_PROP_FPS):g} fps"))
+        cap.release()
+    return found
+
+
+class FramePool:
+    """
+    Reused frame buffers for the pipeline, so capture doesn't allocate a new
+    image every frame.
+
+    acquire() hands out a free buffer of the current frame shape (size buffers
+    are preallocated per shape, more are allocated if all are in flight) and
+    release() gives it back once the frame was displayed or dropped.
+    allocated counts every buffer ever created: it stops growing once the
+    pool covers the frames in flight.
+    """
+
+    def __init__(self, size=6):
+        self.size = size
+        self.allocated = 0
+        self._shape = None
+        self._free = []
+        self._lock = threading.Lock()
+
+    def acquire(self, shape):
+        with self._lock:
+            if shape != self._shape:
+                # New frame size: buffers of the old size are let go as they come back
+                self._shape = shape
+                self._free = [np.empty(shape, dtype=np.uint8) for _ in range(self.size)]
+                self.allocated += self.size
+            if self._free:
+                return self._free.pop()
+            self.allocated += 1
+        return np.empty(shape, dtype=np.uint8)
+
+    def release(self, buffer):
+        with self._lock:
+            if buffer.shape == self._shape and len(self._free) < self.size:
+                self._free.append(buffer)
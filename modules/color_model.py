@@ -0,0 +1,94 @@
+import cv2
+import numpy as np
+
+LUT_BITS = 5 # Bits kept per BGR channel: a 32x32x32 table
+LUT_SIZE = 1 << LUT_BITS
+_SHIFT = 8 - LUT_BITS
+_INDEX_WEIGHTS = np.array([[LUT_SIZE * LUT_SIZE, LUT_SIZE, 1]], np.float32) # b, g, r -> flat LUT index
+
+_bin_hsv = None
+
+
+def bin_centers_hsv():
+    """(LUT_SIZE**3, 3) int32 HSV of every LUT cell's center color, in flat LUT order"""
+    global _bin_hsv
+    if _bin_hsv is None:
+        levels = (np.arange(LUT_SIZE) << _SHIFT) + (1 << _SHIFT) // 2
+        b, g, r = np.meshgrid(levels, levels, levels, indexing="ij")
+        bgr = np.stack([b, g, r], axis=-1).astype(np.uint8).reshape(-1, 1, 3)
+        _bin_hsv = cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV).reshape(-1, 3).astype(np.int32)
+    return _bin_hsv
+
+
+def hue_difference(h, center):
+    """Signed OpenCV hue difference (0..179 scale) with wrap-around, in [-90, 90)"""
+    return (np.asarray(h, dtype=np.float32) - center + 90) % 180 - 90
+
+
+class ColorModel:
+    """
+    A marker color.
+
+    Colors fitted to a sampled patch are compiled into a 32x32x32 lookup
+    table over quantized BGR: classifying a frame is a single table lookup
+    per pixel, no HSV conversion, and red markers whose hue wraps around
+    0/179 cost the same as any other color.
+
+    Plain HSV boxes (the default marker) stay on cv2.inRange, which is exact
+    and already a single pass; at 5 bits per channel the table can't follow
+    a tight saturation / value bound on dark pixels.
+    """
+
+    def __init__(self, lut=None, hsv_range=None, description=""):
+        self.lut = np.where(lut.reshape(-1), 255, 0).astype(np.uint8) if lut is not None else None
+        self.hsv_range = hsv_range # (lower, upper) uint8 arrays, used when there is no table
+        self.description = description
+
+    @classmethod
+    def from_hsv_range(cls, lower, upper):
+        """Same pixels as cv2.inRange(hsv, lower, upper); lower hue > upper hue wraps through red"""
+        lower = np.asarray(lower, np.uint8)
+        upper = np.asarray(upper, np.uint8)
+        return cls(hsv_range=(lower, upper), description=f"HSV {lower.tolist()}-{upper.tolist()}")
+
+    @classmethod
+    def from_patch(cls, patch, max_distance=3.0, min_hue_std=3.0, min_sat_std=12.0, value_margin=40):
+        """
+        Fits a Gaussian over (hue, saturation) of a BGR patch, hue taken
+        around its circular mean so reds don't split in two. Colors within
+        max_distance standard deviations (Mahalanobis) and not much darker
+        than the patch belong to the model.
+        """
+        hsv = cv2.cvtColor(np.ascontiguousarray(patch), cv2.COLOR_BGR2HSV).reshape(-1, 3).astype(np.float32)
+        angles = hsv[:, 0] * (np.pi / 90)
+        hue = round(float(np.arctan2(np.sin(angles).mean(), np.cos(angles).mean()) * 90 / np.pi)) % 180
+
+        samples = np.stack([hue_difference(hsv[:, 0], hue), hsv[:, 1]], axis=1)
+        mean = samples.mean(axis=0)
+        cov = np.cov(samples, rowvar=False) if len(samples) > 1 else np.zeros((2, 2))
+        # A flat patch has (almost) no spread; don't let the model shrink to nothing
+        cov = cov + np.diag([min_hue_std ** 2, min_sat_std ** 2])
+        min_value = max(50.0, float(np.percentile(hsv[:, 2], 5)) - value_margin)
+
+        centers = bin_centers_hsv()
+        d = np.stack([hue_difference(centers[:, 0], hue) - mean[0], centers[:, 1] - mean[1]], axis=1)
+        distance = np.einsum("ij,jk,ik->i", d, np.linalg.inv(cov), d)
+        inside = (distance <= max_distance ** 2) & (centers[:, 2] >= min_value)
+        return cls(inside, description=f"hue {hue:.0f}, sat {hsv[:, 1].mean():.0f}, min value {min_value:.0f}")
+
+    def classify(self, bgr):
+        """uint8 mask (255 = marker color) of a BGR image"""
+        if self.lut is None:
+            lower, upper = self.hsv_range
+            hsv = cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV)
+            if lower[0] <= upper[0]:
+                return cv2.inRange(hsv, lower, upper)
+            # Hue wraps: [lower, 179] or [0, upper]
+            high = cv2.inRange(hsv, lower, np.array([179, upper[1], upper[2]], np.uint8))
+            low = cv2.inRange(hsv, np.array([0, lower[1], lower[2]], np.uint8), upper)
+            return cv2.bitwise_or(high, low)
+
+        q = bgr.astype(np.uint16)
+        q >>= _SHIFT
+        index = cv2.transform(q, _INDEX_WEIGHTS)
+        return self.lut[index]
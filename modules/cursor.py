@@ -0,0 +1,103 @@
+import threading
+import time
+
+import numpy as np
+
+
+class CursorEngine:
+    """
+    Moves the cursor at a fixed rate (e.g. 120 Hz) from its own thread,
+    independent of the camera frame rate.
+
+    The vision loop only reports timestamped targets with set_target(). Between
+    targets the engine extrapolates along the measured velocity (lead_ms ahead,
+    to hide inference latency) and eases the cursor towards that prediction
+    with the same time-scaled smoothing the modes used per frame.
+
+    target_filter (see modules/filters.py) filters the reported targets first,
+    e.g. a One Euro filter to remove jitter without lagging fast moves.
+    """
+
+    def __init__(self, input_dispatcher, rate_hz=120, smoothening=5, lead_ms=30, max_extrapolate_ms=120,
+                 target_filter=None):
+        # smoothening: divisor per 1/30 s of real time (bigger = smoother, slower)
+        # lead_ms: how far ahead of the newest target to aim
+        # max_extrapolate_ms: stop predicting when no new target arrived for this long
+        self.input = input_dispatcher
+        self.rate_hz = rate_hz
+        self.smoothening = smoothening
+        self.lead_ms = lead_ms
+        self.max_extrapolate_ms = max_extrapolate_ms
+        self.target_filter = target_filter
+
+        self._lock = threading.Lock()
+        self._target = None # (x, y)
+        self._target_ms = None # Capture timestamp of the target
+        self._arrived = None # time.monotonic() when the target was reported
+        self._vx, self._vy = 0.0, 0.0 # px per ms, capture time
+        self._x, self._y = None, None # Last position sent
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="cursor", daemon=True)
+        self._thread.start()
+
+    def set_target(self, x, y, timestamp_ms):
+        """Newest target in screen pixels, timestamp_ms: capture time of the frame it came from"""
+        if self.target_filter:
+            x, y = self.target_filter(np.array((x, y)), timestamp_ms)
+        with self._lock:
+            if self._target is not None and timestamp_ms > self._target_ms:
+                dt = timestamp_ms - self._target_ms
+                vx = (x - self._target[0]) / dt
+                vy = (y - self._target[1]) / dt
+                # Light smoothing, landmark jitter would otherwise be amplified
+                self._vx = 0.5 * self._vx + 0.5 * vx
+                self._vy = 0.5 * self._vy + 0.5 * vy
+            self._target = (x, y)
+            self._target_ms = timestamp_ms
+            self._arrived = time.monotonic()
+
+    def release(self):
+        """Tracking lost: stop predicting and stay where we are"""
+        with self._lock:
+            self._target = None
+            self._vx, self._vy = 0.0, 0.0
+        if self.target_filter:
+            self.target_filter.reset()
+
+    def _predict(self, now):
+        with self._lock:
+            if self._target is None:
+                return None
+            age_ms = (now - self._arrived) * 1000
+            if age_ms > self.max_extrapolate_ms:
+                return self._target
+            ahead = age_ms + self.lead_ms
+            return (self._target[0] + self._vx * ahead, self._target[1] + self._vy * ahead)
+
+    def _run(self):
+        period = 1.0 / self.rate_hz
+        last = time.monotonic()
+        while self._running:
+            time.sleep(period)
+            now = time.monotonic()
+            dt_ms = (now - last) * 1000
+            last = now
+
+            goal = self._predict(now)
+            if goal is None:
+                continue
+            if self._x is None:
+                self._x, self._y = goal
+            else:
+                # Settled: don't flood the OS with sub-pixel moves
+                if abs(goal[0] - self._x) < 0.5 and abs(goal[1] - self._y) < 0.5:
+                    continue
+                alpha = 1 - (1 - 1 / self.smoothening) ** (dt_ms / (1000 / 30))
+                self._x += (goal[0] - self._x) * alpha
+                self._y += (goal[1] - self._y) * alpha
+            self.input.move_to(self._x, self._y)
+
+    def close(self):
+        self._running = False
+        self._thread.join(timeout=1.0)
@@ -1,11 +1,20 @@
 import cv2
 import numpy as np
 
+from modules.color_model import ColorModel
+from modules.marker_tracker import MarkerTracker
+from modules.profiler import profiler
+from modules.ui import OverlayCache
+
 class DrawingMode:
     def __init__(self):
         # HSV Colors for Detection (Blue marker default)
         self.celesteBajo = np.array([75, 185, 88], np.uint8)
         self.celesteAlto = np.array([112, 255, 255], np.uint8)
+        # One tracker per marker; clicking recalibrates the first, Shift+click adds another
+        self.markers = [MarkerTracker(ColorModel.from_hsv_range(self.celesteBajo, self.celesteAlto))]
+        self.max_markers = 4
+        self.patch_radius = 7 # Calibration samples a (2r+1)^2 patch around the click
 
         # Drawing Colors (BGR)
         self.colors = {
@@ -32,15 +41,18 @@ class DrawingMode:
         self.current_color = self.colors["Blue"]
         self.brush_thickness = 6
         self.eraser_thickness = 50
-        self.x1 = None
-        self.y1 = None
+        self.pen_points = [None] # Last stroke point of each marker
         self.imAux = None
+        self.canvas_mask = None # 255 where the canvas has paint, kept up to date per stroke
+        self.canvas_bbox = None # (x1, y1, x2, y2) region that has ever been painted since the last clear
         self.needs_clear = False
+        self.overlays = OverlayCache()
         
         # Calibration State
-        self.click_point = None
+        # (x, y, add) from the UI thread, set in one assignment so process() never sees half a click
+        self.pending_click = None
 
-    def handle_click(self, x, y):
+    def handle_click(self, x, y, add=False):
         """Receives click coordinates from main loop for calibration"""
         # If clicked in header, ignore (handled by UI logic typically, but UI logic depends on detection)
         # Actually, let's allow clicking ANYWHERE to calibrate if we want, 
@@ -52,24 +64,26 @@ class DrawingMode:
         # Simplest UX: Just click on the object you want to track.
         # But we need to avoid accidental recalibration when drawing.
         # Let's add a "Pick Color" button to the UI.
-        self.click_point = (x, y)
+        self.pending_click = (x, y, add)
 
+    @profiler.timed("drawing.process")
     def process(self, frame):
         h, w, c = frame.shape
         
         # Initialize or Clear Canvas safely
-        if self.imAux is None or self.needs_clear:
+        if self.imAux is None or self.needs_clear or self.imAux.shape != frame.shape:
             self.imAux = np.zeros(frame.shape, dtype=np.uint8)
+            self.canvas_mask = np.zeros((h, w), dtype=np.uint8)
+            self.canvas_bbox = None
             self.needs_clear = False
             
         # Update Clear Button Position based on current frame width
         self.buttons[-1]["center"] = (w - 80, 40)
 
-        frameHSV = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        
         # Handle Calibration Click
-        if self.click_point:
-            cx, cy = self.click_point
+        click, self.pending_click = self.pending_click, None
+        if click:
+            cx, cy, add = click
             # Check if inside UI header
             if cy < self.header_height:
                  pass # UI click, handled in loop logic or via check_ui_interaction?
@@ -77,98 +91,110 @@ class DrawingMode:
                  # Mouse click is different. 
                  # Let's just use the mouse click for calibration for now to keep it simple as requested.
             else:
-                # Sample Color
-                pixel = frameHSV[cy, cx]
-                h_val, s_val, v_val = pixel
-                
-                # Define new range with some tolerance
-                # Tolerance: H +/- 10, S +/- 40, V +/- 40
-                # Use int32 to avoid overflow during calculation, then clip
-                h_low = max(0, int(h_val) - 10)
-                s_low = max(50, int(s_val) - 40)
-                v_low = max(50, int(v_val) - 40)
-                
-                h_high = min(179, int(h_val) + 10)
-                
-                self.celesteBajo = np.array([h_low, s_low, v_low], np.uint8)
-                self.celesteAlto = np.array([h_high, 255, 255], np.uint8)
+                # Sample a patch and fit a color model to it (see ColorModel)
+                r = self.patch_radius
+                patch = frame[max(0, cy - r):cy + r + 1, max(0, cx - r):cx + r + 1]
+                model = ColorModel.from_patch(patch)
+
+                if add and len(self.markers) < self.max_markers:
+                    self.markers.append(MarkerTracker(model))
+                    self.pen_points.append(None)
+                    print(f"Tracking marker {len(self.markers)}: {model.description}")
+                else:
+                    self.markers[0].set_model(model)
+                    self.pen_points[0] = None
+                    print(f"Calibrated to: {model.description}")
+
+        # Detect Marker (windowed, low-res search + full-res refinement, see MarkerTracker)
+        with profiler.stage("drawing.track"):
+            pens = [marker.locate(frame) for marker in self.markers]
+
+        # Draw UI Overlay: cached sprite, re-rendered only when the selection or frame size changes
+        self.overlays.draw(frame, ("header", self._selected_button()), self._render_header)
+
+        for i, pen in enumerate(pens):
+            if pen is None:
+                self.pen_points[i] = None
+                continue
+            x2, y2 = pen
+            
+            # Check UI Interaction (Pointer in Header)
+            if y2 < self.header_height:
+                self._check_ui_interaction(x2, y2)
+                self.pen_points[i] = None # Don't draw while selecting
+            else:
+                # Draw on Canvas
+                if self.pen_points[i] is not None:
+                    # Draw line
+                    x1, y1 = self.pen_points[i]
+                    thickness = self.eraser_thickness if self.current_color == self.colors["Eraser"] else self.brush_thickness
+                    
+                    cv2.line(self.imAux, (x1, y1), (x2, y2), self.current_color, thickness)
+                    self._update_mask(x1, y1, x2, y2, thickness)
                 
-                print(f"Calibrated to: HSV[{h_val}, {s_val}, {v_val}]")
+                self.pen_points[i] = (x2, y2)
             
-            self.click_point = None
+            # Visual Feedback of Pointer
+            cv2.circle(frame, (x2, y2), 5, self.current_color, -1)
 
-        # Detect Marker
-        mask = cv2.inRange(frameHSV, self.celesteBajo, self.celesteAlto)
-        mask = cv2.erode(mask, None, iterations=1)
-        mask = cv2.dilate(mask, None, iterations=2)
-        mask = cv2.medianBlur(mask, 13)
-        
-        cnts, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        cnts = sorted(cnts, key=cv2.contourArea, reverse=True)[:1]
+        # Merge Canvas with Frame: only inside the painted region, in one masked copy
+        if self.canvas_bbox is not None:
+            bx1, by1, bx2, by2 = self.canvas_bbox
+            cv2.copyTo(self.imAux[by1:by2, bx1:bx2], self.canvas_mask[by1:by2, bx1:bx2], frame[by1:by2, bx1:bx2])
+
+        return frame
+
+    def _update_mask(self, x1, y1, x2, y2, thickness):
+        """Refreshes the canvas mask in the dirty rectangle of one stroke segment"""
+        h, w = self.canvas_mask.shape
+        pad = thickness // 2 + 2
+        dx1, dy1 = max(0, min(x1, x2) - pad), max(0, min(y1, y2) - pad)
+        dx2, dy2 = min(w, max(x1, x2) + pad + 1), min(h, max(y1, y2) + pad + 1)
+        if dx1 >= dx2 or dy1 >= dy2:
+            return
 
-        # Draw UI Overlay
-        cv2.rectangle(frame, (0, 0), (w, self.header_height), (50, 50, 50), -1) # Header BG
-        cv2.rectangle(frame, (0, 0), (w, self.header_height), (100, 100, 100), 2) # Border
+        gray = cv2.cvtColor(self.imAux[dy1:dy2, dx1:dx2], cv2.COLOR_BGR2GRAY)
+        cv2.threshold(gray, 10, 255, cv2.THRESH_BINARY, dst=self.canvas_mask[dy1:dy2, dx1:dx2])
+
+        # Erasing never shrinks the box, it only has to cover every painted pixel
+        if self.canvas_bbox is None:
+            self.canvas_bbox = (dx1, dy1, dx2, dy2)
+        else:
+            bx1, by1, bx2, by2 = self.canvas_bbox
+            self.canvas_bbox = (min(bx1, dx1), min(by1, dy1), max(bx2, dx2), max(by2, dy2))
+
+    def _selected_button(self):
+        for name, color in self.colors.items():
+            if color == self.current_color:
+                return name
+        return None
+
+    def _render_header(self, canvas):
+        """Header, buttons and labels (cached as a sprite, see OverlayCache)"""
+        h, w = canvas.shape[:2]
+        selected = self._selected_button()
+
+        cv2.rectangle(canvas, (0, 0), (w, self.header_height), (50, 50, 50), -1) # Header BG
+        cv2.rectangle(canvas, (0, 0), (w, self.header_height), (100, 100, 100), 2) # Border
         
-        cv2.putText(frame, "CLICK object to track it!", (w//2 - 100, 70), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+        cv2.putText(canvas, "CLICK object to track it! (Shift+click: add one)", (w//2 - 170, 70), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
 
         for btn in self.buttons:
+            center = (w - 80, 40) if btn["name"] == "Clear" else btn["center"]
+
             # Draw Button
-            cv2.circle(frame, btn["center"], self.button_radius, btn["color"], -1)
-            cv2.circle(frame, btn["center"], self.button_radius, (200, 200, 200), 2) # Ring
+            cv2.circle(canvas, center, self.button_radius, btn["color"], -1)
+            cv2.circle(canvas, center, self.button_radius, (200, 200, 200), 2) # Ring
             
             # Label
             if btn["name"] == "Eraser":
-                 cv2.putText(frame, "Eraser", (btn["center"][0]-25, btn["center"][1]+45), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255,255,255), 1)
+                 cv2.putText(canvas, "Eraser", (center[0]-25, center[1]+45), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255,255,255), 1)
             elif btn["name"] == "Clear":
-                 cv2.putText(frame, "Clear All", (btn["center"][0]-30, btn["center"][1]+45), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255,255,255), 1)
+                 cv2.putText(canvas, "Clear All", (center[0]-30, center[1]+45), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255,255,255), 1)
 
             # Highlight Selected
-            is_selected = False
-            if btn["name"] == "Eraser" and self.current_color == self.colors["Eraser"]:
-                is_selected = True
-            elif btn["name"] in self.colors and self.colors[btn["name"]] == self.current_color:
-                is_selected = True
-            
-            if is_selected:
-                 cv2.circle(frame, btn["center"], self.button_radius + 5, (0, 255, 0), 3)
-
-
-        for c in cnts:
-            area = cv2.contourArea(c)
-            if area > 1000:
-                x, y, w_box, h_box = cv2.boundingRect(c)
-                x2 = x + w_box // 2
-                y2 = y
-                
-                # Check UI Interaction (Pointer in Header)
-                if y2 < self.header_height:
-                    self._check_ui_interaction(x2, y2)
-                    self.x1, self.y1 = None, None # Don't draw while selecting
-                else:
-                    # Draw on Canvas
-                    if self.x1 is not None:
-                        # Draw line
-                        thickness = self.eraser_thickness if self.current_color == self.colors["Eraser"] else self.brush_thickness
-                        
-                        cv2.line(self.imAux, (self.x1, self.y1), (x2, y2), self.current_color, thickness)
-                    
-                    self.x1 = x2
-                    self.y1 = y2
-                
-                # Visual Feedback of Pointer
-                cv2.circle(frame, (x2, y2), 5, self.current_color, -1)
-            else:
-                self.x1, self.y1 = None, None
-
-        # Merge Canvas with Frame
-        imAuxGray = cv2.cvtColor(self.imAux, cv2.COLOR_BGR2GRAY)
-        _, th = cv2.threshold(imAuxGray, 10, 255, cv2.THRESH_BINARY)
-        thInv = cv2.bitwise_not(th)
-        frame = cv2.bitwise_and(frame, frame, mask=thInv)
-        frame = cv2.add(frame, self.imAux)
-
-        return frame
+            if btn["name"] == selected:
+                 cv2.circle(canvas, center, self.button_radius + 5, (0, 255, 0), 3)
 
     def _check_ui_interaction(self, x, y):
         # Specific hit testing for buttons
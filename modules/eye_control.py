@@ -1,102 +1,214 @@
 import cv2
 import mediapipe as mp
 import numpy as np
-import os
 import pyautogui
-import time
+
+from modules.blendshapes import BlendshapeEventDetector, blendshape_scores
+from modules.face_service import FaceInferenceService
+from modules.filters import make_filter
+from modules.frame_clock import FrameClock
+from modules.head_pose import DEFAULT_CALIBRATION_PATH, GRID, HeadPosePointer
+from modules.cursor import CursorEngine
+from modules.input_dispatcher import InputDispatcher
+from modules.landmarks import landmarks_to_array, largest_face
+from modules.profiler import profiler
 
 class EyeControlMode:
-    def __init__(self):
-        # We need Face Landmarker, which provides 478 landmarks including iris
-        BaseOptions = mp.tasks.BaseOptions
-        FaceLandmarker = mp.tasks.vision.FaceLandmarker
-        FaceLandmarkerOptions = mp.tasks.vision.FaceLandmarkerOptions
-        VisionRunningMode = mp.tasks.vision.RunningMode
-
-        model_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models', 'face_landmarker.task')
-        
-        if not os.path.exists(model_path):
-             raise FileNotFoundError(f"Model file not found at {model_path}. Please run tools/download_model.py")
-
-        options = FaceLandmarkerOptions(
-            base_options=BaseOptions(model_asset_path=model_path),
-            running_mode=VisionRunningMode.VIDEO,
-            num_faces=1,
-            min_face_detection_confidence=0.5,
-            min_face_presence_confidence=0.5,
-            min_tracking_confidence=0.5,
-            output_face_blendshapes=True,
-            output_facial_transformation_matrixes=True)
-            
-        self.landmarker = FaceLandmarker.create_from_options(options)
-        self.timestamp_ms = 0
+    def __init__(self, live_stream=False, face_service=None, input_dispatcher=None, cursor_rate_hz=120, filters=None,
+                 face_clicks=True, pointer="pose", calibration_path=DEFAULT_CALIBRATION_PATH):
+        # We need Face Landmarker, which provides 478 landmarks including iris.
+        # It is owned by the shared FaceInferenceService; live_stream only applies
+        # when this mode has to create its own service.
+        # Facial gestures (winks, mouth, brows) from blendshapes; the service only
+        # computes blendshapes / head matrixes when some mode asks for them
+        self.face_events = BlendshapeEventDetector() if face_clicks else None
+        # pointer="pose": cursor from head yaw / pitch + iris offsets through a per-user
+        # calibration (see modules/head_pose.py), "nose": nose tip position in the frame
+        self.head_pose = HeadPosePointer(calibration_path) if pointer == "pose" else None
+        # Outputs this mode needs from the service: a shared one only produces them
+        # between activate() and deactivate(), so other modes don't pay for them
+        self._face_outputs = {"blendshapes": bool(self.face_events),
+                              "transformation_matrixes": bool(self.face_events or self.head_pose)}
+        self._outputs_required = False
+
+        self._owns_face_service = face_service is None
+        if face_service is None:
+            face_service = FaceInferenceService(num_faces=1, live_stream=live_stream, **self._face_outputs)
+        self.face_service = face_service
+        self._calibrate_requested = False # Set by handle_key() on the UI thread
+        # (event, "down" | "up") -> handler()
+        self.actions = {
+            ("wink_left", "down"): self._left_click,
+            ("wink_right", "down"): self._right_click,
+            ("mouth_open", "down"): self._toggle_active,
+            ("brows_up", "down"): self._double_click,
+        }
+
+        # Mouse input goes through the (shared) InputDispatcher thread
+        self._owns_input = input_dispatcher is None
+        self.input = input_dispatcher or InputDispatcher()
+
+        self.timestamp_ms = -1 # Stamp of the last processed frame
+        self.clock = FrameClock() # Fallback when callers don't pass a capture stamp
         self.screen_w, self.screen_h = pyautogui.size()
         
-        # Smoothening
-        self.prev_x, self.prev_y = 0, 0
-        self.smoothening = 10 # Strong smoothing for gaze
+        # Filtering (see modules/filters.py): {"landmarks": config, "cursor": config} overrides.
+        # Head pointing is slow and precise, so the cursor filter is much stronger than hand control's
+        self.filters = {
+            "landmarks": None, # e.g. "kalman" to filter all 478 points
+            "cursor": {"type": "one_euro", "min_cutoff": 0.3, "beta": 0.005},
+        }
+        self.filters.update(filters or {})
+        self.landmark_filter = make_filter(self.filters["landmarks"])
+
+        # Smoothening: strong smoothing for gaze, applied by the cursor thread at cursor_rate_hz
+        cursor_filter = make_filter(self.filters["cursor"])
+        self.cursor = CursorEngine(self.input, rate_hz=cursor_rate_hz, smoothening=4 if cursor_filter else 10,
+                                   target_filter=cursor_filter)
         
-        # Calibrating "Center" gaze
-        # Ideally we'd calibrate, but let's assume looking straight = center screen
-        # We use nose tip as anchor and iris relative position? 
-        # Actually, for "Follow Eyes" robustly without per-user calib, 
-        # combining Head Pose (nose) + Eye Gaze is best.
-        # Let's start with Head Pose (Nose) as "Gaze" proxy because it's much more stable for mouse control
-        # than raw eye tracking which jitters a lot.
+        # Head pose (+ iris) is much more stable for mouse control than raw eye
+        # tracking, which jitters a lot. Press 'c' to calibrate it to the screen.
         
-        self.active = False # Toggle via facial gesture?
+        self.active = True # Opening the mouth pauses / resumes head control
+
+    def activate(self):
+        """Mode selected (see ModeRegistry.activate): turn on the face outputs it needs"""
+        if not self._outputs_required:
+            self._outputs_required = True
+            self.face_service.require(**self._face_outputs)
+
+    def deactivate(self):
+        """Mode left: hand the face outputs back"""
+        if self._outputs_required:
+            self._outputs_required = False
+            self.face_service.release(**self._face_outputs)
+
+    def close(self):
+        """Stops the cursor thread and releases the face service / input dispatcher if this mode created them"""
+        self.cursor.close()
+        self.deactivate()
+        if self._owns_face_service:
+            self.face_service.close()
+        if self._owns_input:
+            self.input.close()
+
+    def handle_key(self, key):
+        """'c' starts (or cancels) the head pose calibration. Called from the UI thread."""
+        if key == ord('c') and self.head_pose:
+            self._calibrate_requested = True
+            return True
+        return False
+
+    def _left_click(self):
+        self.input.click()
+
+    def _right_click(self):
+        self.input.click(button="right")
+
+    def _double_click(self):
+        self.input.click()
+        self.input.click()
 
-    def process(self, frame):
+    def _toggle_active(self):
+        self.active = not self.active
+        print("Eye control " + ("resumed" if self.active else "paused"))
+
+    @profiler.timed("eye.process")
+    def process(self, frame, timestamp_ms=None, frame_id=None):
+        """timestamp_ms: capture time of the frame (see FrameClock), frame_id: pipeline frame number"""
         h, w, c = frame.shape
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
-        self.timestamp_ms += int(1000/30)
+        mp_image = None # Recorded landmarks (LandmarkRecording replay) don't need the image
+        if not getattr(self.face_service, "replay", False):
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
+
+        # MediaPipe needs strictly increasing timestamps
+        self.timestamp_ms = self.clock.monotonic(timestamp_ms, self.timestamp_ms)
         
-        detection_result = self.landmarker.detect_for_video(mp_image, self.timestamp_ms)
+        detection_result = self.face_service.detect(mp_image, self.timestamp_ms, frame_id)
         
-        if detection_result.face_landmarks:
-            landmarks = detection_result.face_landmarks[0]
+        if detection_result and detection_result.face_landmarks:
+            # The user is the closest face, others in view must not grab the cursor
+            face = largest_face(detection_result.face_landmarks)
+            landmarks = detection_result.face_landmarks[face]
             
             # --- GAZE / HEAD TRACKING LOGIC ---
             # Landmark 1 is nose tip.
             # Landmark 468 is Left Iris Center, 473 is Right Iris Center
             
-            nose_tip = landmarks[1]
-            left_iris = landmarks[468]
-            right_iris = landmarks[473]
-            
-            # Using Nose Tip for broad movement (Head Pointing)
-            # This is standard "Gaze Mouse" for accessibility without eye trackers
-            
-            # Define Active Region (Center of screen)
-            margin_x = w * 0.4
-            margin_y = h * 0.4
-            
-            # Draw Guide Box
-            cv2.rectangle(frame, (int(margin_x), int(margin_y)), 
-                                 (int(w - margin_x), int(h - margin_y)), (255, 0, 0), 1)
+            points = None
+            nose_x, nose_y = landmarks[1].x, landmarks[1].y
+            if self.landmark_filter or self.head_pose:
+                points = landmarks_to_array(landmarks)
+            if self.landmark_filter:
+                # Filters all 478 points at once
+                points = self.landmark_filter(points, self.timestamp_ms)
+                nose_x, nose_y = points[1, 0], points[1, 1]
 
-            # Map nose position to screen
-            target_x = np.interp(nose_tip.x * w, (margin_x, w - margin_x), (0, self.screen_w))
-            target_y = np.interp(nose_tip.y * h, (margin_y, h - margin_y), (0, self.screen_h))
-            
-            # Smoothing
-            curr_x = self.prev_x + (target_x - self.prev_x) / self.smoothening
-            curr_y = self.prev_y + (target_y - self.prev_y) / self.smoothening
-            
-            self.prev_x, self.prev_y = curr_x, curr_y
+            # Head pose: yaw / pitch from the transformation matrix, plus the irises (468 / 473)
+            feature = None
+            matrixes = detection_result.facial_transformation_matrixes
+            matrix = matrixes[face] if matrixes else None
+            if self.head_pose and matrix is not None:
+                feature = self.head_pose.features(matrix, points)
+
+            if feature is not None:
+                target_x, target_y = self.head_pose.point(feature) * (self.screen_w, self.screen_h)
+            else:
+                # Nose Tip for broad movement (Head Pointing), e.g. replay without matrixes
+                # Define Active Region (Center of screen)
+                margin_x = w * 0.4
+                margin_y = h * 0.4
+                
+                # Draw Guide Box
+                cv2.rectangle(frame, (int(margin_x), int(margin_y)), 
+                                     (int(w - margin_x), int(h - margin_y)), (255, 0, 0), 1)
+
+                # Map nose position to screen
+                target_x = np.interp(nose_x * w, (margin_x, w - margin_x), (0, self.screen_w))
+                target_y = np.interp(nose_y * h, (margin_y, h - margin_y), (0, self.screen_h))
             
             # Visual Feedback
-            cv2.circle(frame, (int(nose_tip.x * w), int(nose_tip.y * h)), 5, (0, 0, 255), -1)
+            cv2.circle(frame, (int(nose_x * w), int(nose_y * h)), 5, (0, 0, 255), -1)
             cv2.putText(frame, "Eye/Head Control", (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+
+            if self._calibrate_requested:
+                self._calibrate_requested = False
+                if self.head_pose.calibrating:
+                    self.head_pose.cancel_calibration()
+                else:
+                    self.head_pose.start_calibration()
+            if self.head_pose and self.head_pose.calibrating:
+                # The OS cursor shows the target to look at; no cursor control or clicks meanwhile
+                self.cursor.release()
+                index = self.head_pose.target_index
+                self.input.move_to(*(GRID[index] * (self.screen_w, self.screen_h)))
+                cv2.putText(frame, f"Calibrating: look at the mouse cursor ({index + 1}/{len(GRID)})", (50, 90),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+                self.head_pose.add_sample(feature, self.timestamp_ms)
+                return frame
             
-            # Move mouse
-            try:
-                pyautogui.moveTo(curr_x, curr_y)
-            except:
-                pass
-                
-            # --- BLINK DETECTION FOR CLICK? ---
-            # Or simplified: just cursor movement for now as requested.
+            # Facial gestures: evaluated on this frame's blendshapes, no extra delay
+            if self.face_events and detection_result.face_blendshapes:
+                with profiler.stage("eye.face_events"):
+                    events = self.face_events.update(blendshape_scores(detection_result.face_blendshapes[face]),
+                                                     self.timestamp_ms, matrix)
+                for event in events:
+                    action = self.actions.get(event)
+                    if action and (self.active or event[0] == "mouth_open"):
+                        action()
+
+            if self.active:
+                # Move mouse: the cursor thread smooths / extrapolates towards the target
+                self.cursor.set_target(target_x, target_y, self.timestamp_ms)
+            else:
+                self.cursor.release()
+                cv2.putText(frame, "Paused: open mouth to resume", (50, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+        else:
+            self.cursor.release()
+            if self.landmark_filter:
+                self.landmark_filter.reset()
+            if self.face_events:
+                self.face_events.reset()
             
         return frame
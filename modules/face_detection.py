@@ -1,70 +1,117 @@
 import cv2
 import mediapipe as mp
-from mediapipe.tasks import python
-from mediapipe.tasks.python import vision
 import numpy as np
-import time
-import os
 
-class FaceDetectionMode:
-    def __init__(self):
-        # Model Path
-        base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        model_path = os.path.join(base_path, 'models', 'face_landmarker.task')
+from modules.face_service import FaceInferenceService
+from modules.face_tracker import FaceTracker
+from modules.frame_clock import FrameClock
+from modules.landmarks import landmarks_to_array
+from modules.profiler import profiler
+
+# Pixels cv2.circle(radius=1, thickness=-1) fills around each point: a small plus
+_DOT_OFFSETS = np.array([(0, 0), (1, 0), (-1, 0), (0, 1), (0, -1)], dtype=np.int32)
+
+
+def draw_point_cloud(frame, points, color):
+    """Same dots as a cv2.circle(pt, 1, color, -1) per point, in one vectorized scatter"""
+    h, w = frame.shape[:2]
+    interior = (points[:, 0] >= 1) & (points[:, 0] < w - 1) & (points[:, 1] >= 1) & (points[:, 1] < h - 1)
+    if frame.flags.c_contiguous:
+        # Fast path: whole dots are inside the frame, scatter by flat index.
+        # reshape() is only a view of a contiguous frame (a crop would get a copy).
+        pixels = frame.reshape(-1, frame.shape[2])
+        inner = points[interior]
+        offsets = _DOT_OFFSETS[:, 1] * w + _DOT_OFFSETS[:, 0]
+        pixels[((inner[:, 1] * w + inner[:, 0])[:, None] + offsets[None, :]).ravel()] = color
+    else:
+        interior[:] = False
 
-        # Check if model exists
-        if not os.path.exists(model_path):
-             raise FileNotFoundError(f"Face model not found at {model_path}")
+    # Dots on (or past) the border are clipped pixel by pixel
+    edge = points[~interior]
+    if len(edge):
+        dots = (edge[:, None, :] + _DOT_OFFSETS[None, :, :]).reshape(-1, 2)
+        dots = dots[(dots[:, 0] >= 0) & (dots[:, 0] < w) & (dots[:, 1] >= 0) & (dots[:, 1] < h)]
+        frame[dots[:, 1], dots[:, 0]] = color
 
-        # Initialize MediaPipe Face Landmarker
-        base_options = python.BaseOptions(model_asset_path=model_path)
-        options = vision.FaceLandmarkerOptions(
-            base_options=base_options,
-            output_face_blendshapes=True,
-            output_facial_transformation_matrixes=True,
-            num_faces=5)
-        self.landmarker = vision.FaceLandmarker.create_from_options(options)
+
+class FaceDetectionMode:
+    def __init__(self, face_service=None, tessellation=False, num_faces=5):
+        # MediaPipe Face Landmarker lives in the shared FaceInferenceService. It tracks
+        # one face by default; this mode raises that to num_faces while it is selected
+        self.num_faces = num_faces
+        self._faces_required = False
+        self._owns_face_service = face_service is None
+        if face_service is None:
+            face_service = FaceInferenceService(num_faces=num_faces)
+        self.face_service = face_service
+        self.timestamp_ms = -1 # Stamp of the last processed frame
+        self.clock = FrameClock() # Fallback when callers don't pass a capture stamp
+        self.tracker = FaceTracker() # Stable IDs for the faces across frames
         
-        # Connections for manual drawing
-        # Since mp.solutions is not available in this environment, we will skip
-        # the full tessellation lines and just draw the landmarks as a point cloud.
-        self.connections = [] 
+        # Landmarks are drawn as a point cloud, or with tessellation=True as the
+        # full face mesh (mp.solutions isn't available, the Tasks API has the edges)
+        self.tessellation = tessellation
+        self.connections = np.zeros((0, 2), dtype=np.int32)
+        if tessellation:
+            self.connections = np.array([(c.start, c.end) for c in
+                                         mp.tasks.vision.FaceLandmarksConnections.FACE_LANDMARKS_TESSELATION], dtype=np.int32)
+
+    def activate(self):
+        """Mode selected (see ModeRegistry.activate): track up to num_faces faces"""
+        if not self._faces_required:
+            self._faces_required = True
+            self.face_service.require(num_faces=self.num_faces)
 
-    def process(self, frame):
+    def deactivate(self):
+        """Mode left: back to the service's default face count"""
+        if self._faces_required:
+            self._faces_required = False
+            self.face_service.release(num_faces=self.num_faces)
+
+    def close(self):
+        """Releases the face service if this mode created it"""
+        self.deactivate()
+        if self._owns_face_service:
+            self.face_service.close()
+
+    @profiler.timed("face_detection.process")
+    def process(self, frame, timestamp_ms=None, frame_id=None):
+        """timestamp_ms: capture time of the frame (see FrameClock), frame_id: pipeline frame number"""
         h, w, c = frame.shape
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame)
+        mp_image = None # Recorded landmarks (LandmarkRecording replay) don't need the image
+        if not getattr(self.face_service, "replay", False):
+            with profiler.stage("face_detection.convert"):
+                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
+
+        self.timestamp_ms = self.clock.monotonic(timestamp_ms, self.timestamp_ms)
         
         # Detect Face
-        detection_result = self.landmarker.detect(mp_image)
+        detection_result = self.face_service.detect(mp_image, self.timestamp_ms, frame_id)
         
-        # Visualize
-        if detection_result.face_landmarks:
-            # Re-implement loop with enumeration for IDs
-            for i, face_landmarks in enumerate(detection_result.face_landmarks):
-                # Manual Drawing of Mesh (Point Cloud)
-                points = []
-                for lm in face_landmarks:
-                    points.append((int(lm.x * w), int(lm.y * h)))
-                
-                # Draw Key Points as Green Dots (Tech Cloud)
-                for pt in points:
-                    cv2.circle(frame, pt, 1, (0, 255, 0), -1)
+        faces = detection_result.face_landmarks if detection_result else []
+        # Pixel landmarks per face, then match the faces to last frame's tracks
+        pixel_points = [(landmarks_to_array(face)[:, :2] * (w, h)).astype(np.int32) for face in faces]
+        boxes = [(*p.min(axis=0), *p.max(axis=0)) for p in pixel_points]
+        track_ids = self.tracker.update(boxes)
 
-                # Draw Bounding Box
-                x_values = [p[0] for p in points]
-                y_values = [p[1] for p in points]
-                
-                x_min = min(x_values)
-                y_min = min(y_values)
-                x_max = max(x_values)
-                y_max = max(y_values)
-                
-                # Add margin
-                margin = 20
-                x_min = max(0, x_min - margin)
-                y_min = max(0, y_min - margin)
-                x_max = min(w, x_max + margin)
-                y_max = min(h, y_max + margin)
+        # Visualize: every face's cloud (or mesh) in one draw call
+        if not faces:
+            return frame
+        with profiler.stage("face_detection.draw"):
+            if self.tessellation:
+                segments = np.concatenate([p[self.connections] for p in pixel_points])
+                cv2.polylines(frame, segments, False, (0, 255, 0), 1)
+            else:
+                draw_point_cloud(frame, np.concatenate(pixel_points), (0, 255, 0))
+
+            margin = 20
+            for (x_min, y_min, x_max, y_max), track_id in zip(boxes, track_ids):
+                # Bounding Box with margin
+                x_min = max(0, int(x_min) - margin)
+                y_min = max(0, int(y_min) - margin)
+                x_max = min(w, int(x_max) + margin)
+                y_max = min(h, int(y_max) + margin)
                 
                 cv2.rectangle(frame, (x_min, y_min), (x_max, y_max), (0, 255, 0), 2)
                 cv2.putText(frame, f"TARGET LOCKED", (x_min, y_min - 10), 
@@ -72,7 +119,7 @@ class FaceDetectionMode:
                 
                 cv2.putText(frame, f"CONFIDENCE: 99.8%", (x_max + 10, y_min + 20),
                              cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 0), 1)
-                cv2.putText(frame, f"ID: 8472-{i+1}", (x_max + 10, y_min + 40),
+                cv2.putText(frame, f"ID: {track_id}", (x_max + 10, y_min + 40),
                              cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 0), 1)
 
         return frame
@@ -0,0 +1,162 @@
+import mediapipe as mp
+import os
+import threading
+from collections import OrderedDict
+
+from modules.frame_clock import FrameClock
+from modules.profiler import profiler
+from modules.roi import RoiTracker
+
+
+class FaceInferenceService:
+    """
+    Owns the single FaceLandmarker shared by every mode that needs face landmarks
+    (gaze safety, eye control, face detection).
+
+    Results are cached by frame ID, so asking twice for the same frame (e.g. two
+    modes looking at one capture) only runs inference once.
+
+    Blendshapes, transformation matrixes and tracking more faces cost extra
+    inference time, so they are only produced while some mode asks for them:
+    require() when the mode is selected, release() when it is left (see
+    ModeRegistry.activate).
+    """
+
+    def __init__(self, num_faces=1, live_stream=False, cache_size=4, roi=False, frame_budget_ms=None,
+                 blendshapes=False, transformation_matrixes=False):
+        # roi: crop inference input around last frame's faces (see RoiTracker)
+        # frame_budget_ms: lower the inference resolution while inference takes longer than this
+        model_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models', 'face_landmarker.task')
+        if not os.path.exists(model_path):
+             raise FileNotFoundError(f"Model file not found at {model_path}. Please run tools/download_model.py")
+
+        self.model_path = model_path
+        self.num_faces = num_faces
+        self.live_stream = live_stream
+        self.blendshapes = blendshapes
+        self.transformation_matrixes = transformation_matrixes
+        self._defaults = {"blendshapes": blendshapes, "transformation_matrixes": transformation_matrixes,
+                          "num_faces": num_faces}
+        self._requests = {"blendshapes": 0, "transformation_matrixes": 0} # Modes currently needing each output
+        self._num_faces_requests = [] # num_faces of every require() that asked for more faces
+        self._closed = False
+        self._latest_result = None
+        self.roi = RoiTracker(max_objects=num_faces, budget_ms=frame_budget_ms) if roi else None
+
+        self.landmarker = self._create_landmarker()
+        self.timestamp_ms = -1
+        self.clock = FrameClock() # Fallback when callers don't pass a capture stamp
+
+        self.recorder = None # Optional LandmarkRecorder, gets every inference result
+
+        self.cache_size = cache_size
+        self._cache = OrderedDict() # frame_id -> result
+        self._lock = threading.Lock()
+
+    def _create_landmarker(self):
+        BaseOptions = mp.tasks.BaseOptions
+        FaceLandmarker = mp.tasks.vision.FaceLandmarker
+        FaceLandmarkerOptions = mp.tasks.vision.FaceLandmarkerOptions
+        VisionRunningMode = mp.tasks.vision.RunningMode
+
+        options = FaceLandmarkerOptions(
+            base_options=BaseOptions(model_asset_path=self.model_path),
+            running_mode=VisionRunningMode.LIVE_STREAM if self.live_stream else VisionRunningMode.VIDEO,
+            num_faces=self.num_faces,
+            min_face_detection_confidence=0.5,
+            min_face_presence_confidence=0.5,
+            min_tracking_confidence=0.5,
+            output_face_blendshapes=self.blendshapes,
+            output_facial_transformation_matrixes=self.transformation_matrixes,
+            result_callback=self._on_result if self.live_stream else None)
+        return FaceLandmarker.create_from_options(options)
+
+    def require(self, blendshapes=False, transformation_matrixes=False, num_faces=None):
+        """
+        Turns on extra outputs a mode needs (num_faces: track up to that many
+        faces), until the mode calls release() with the same arguments.
+        Requests are counted per output; the largest num_faces asked for wins.
+        """
+        self._update_requests(1, num_faces, blendshapes=blendshapes, transformation_matrixes=transformation_matrixes)
+
+    def release(self, blendshapes=False, transformation_matrixes=False, num_faces=None):
+        """Undoes a require(); outputs nobody needs anymore are turned off again"""
+        self._update_requests(-1, num_faces, blendshapes=blendshapes, transformation_matrixes=transformation_matrixes)
+
+    def _update_requests(self, delta, num_faces, **outputs):
+        with self._lock:
+            for name, wanted in outputs.items():
+                if wanted:
+                    self._requests[name] = max(0, self._requests[name] + delta)
+            if num_faces:
+                if delta > 0:
+                    self._num_faces_requests.append(num_faces)
+                elif num_faces in self._num_faces_requests:
+                    self._num_faces_requests.remove(num_faces)
+            blendshapes = self._defaults["blendshapes"] or self._requests["blendshapes"] > 0
+            matrixes = self._defaults["transformation_matrixes"] or self._requests["transformation_matrixes"] > 0
+            num_faces = max([self._defaults["num_faces"]] + self._num_faces_requests)
+            if (blendshapes, matrixes, num_faces) == (self.blendshapes, self.transformation_matrixes, self.num_faces) \
+                    or self._closed:
+                return
+            # The landmarker's settings are fixed at creation: rebuild it
+            self.blendshapes = blendshapes
+            self.transformation_matrixes = matrixes
+            self.num_faces = num_faces
+            if self.roi:
+                self.roi.max_objects = num_faces
+            self.landmarker.close()
+            self.landmarker = self._create_landmarker()
+            self._cache.clear()
+
+    def _on_result(self, result, output_image, timestamp_ms):
+        """LIVE_STREAM callback: keep only the newest face result"""
+        if self.roi and not self.roi.finish(result.face_landmarks, timestamp_ms):
+            return # Miss caused by moving the crop window: keep the previous result
+        self._latest_result = result
+
+    def detect(self, mp_image, timestamp_ms, frame_id=None):
+        """
+        Returns the FaceLandmarkerResult for a frame (None while a LIVE_STREAM
+        service has not produced its first result yet).
+
+        frame_id defaults to the capture timestamp, which is unique per frame.
+        """
+        key = frame_id if frame_id is not None else timestamp_ms
+
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+
+            # MediaPipe needs strictly increasing timestamps across all callers
+            self.timestamp_ms = self.clock.monotonic(timestamp_ms, self.timestamp_ms)
+
+            if self.roi:
+                image = self.roi.prepare(mp_image.numpy_view(), self.timestamp_ms)
+                mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=image)
+
+            if self.live_stream:
+                with profiler.stage("face.submit"):
+                    self.landmarker.detect_async(mp_image, self.timestamp_ms)
+                result = self._latest_result
+            else:
+                with profiler.stage("face.detect"):
+                    result = self.landmarker.detect_for_video(mp_image, self.timestamp_ms)
+                if self.roi and not self.roi.finish(result.face_landmarks, self.timestamp_ms):
+                    result = self._latest_result # Miss caused by moving the crop window
+                self._latest_result = result
+
+            if self.recorder:
+                self.recorder.record_face(self.timestamp_ms, key, result)
+
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+            return result
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._cache.clear()
+            self.landmarker.close()
@@ -0,0 +1,73 @@
+import numpy as np
+
+
+def box_iou(a, b):
+    """(N, M) IoU between two arrays of (x1, y1, x2, y2) boxes"""
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-6)
+
+
+class FaceTracker:
+    """
+    Gives every face a track ID that stays the same from frame to frame.
+
+    The landmarker reports faces in no particular order, so each frame's
+    boxes are matched to the existing tracks by overlap (greedy, best IoU
+    first). Unmatched faces start a new track; a track survives max_missing
+    frames without a match so a face that flickers out keeps its ID.
+    """
+
+    def __init__(self, min_iou=0.3, max_missing=30):
+        self.min_iou = min_iou
+        self.max_missing = max_missing
+        self.next_id = 1
+        self._ids = []
+        self._boxes = np.zeros((0, 4), dtype=np.float32)
+        self._missing = []
+
+    def update(self, boxes):
+        """boxes: (N, 4) face boxes of one frame. Returns the N track IDs, in the same order."""
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        ids = [None] * len(boxes)
+        matched = set()
+
+        if len(boxes) and len(self._ids):
+            iou = box_iou(self._boxes, boxes)
+            for flat in np.argsort(iou, axis=None)[::-1]:
+                t, d = (int(i) for i in np.unravel_index(flat, iou.shape))
+                if iou[t, d] < self.min_iou:
+                    break
+                if t in matched or ids[d] is not None:
+                    continue
+                matched.add(t)
+                ids[d] = self._ids[t]
+                self._boxes[t] = boxes[d]
+                self._missing[t] = 0
+
+        # Age out the tracks nobody matched
+        keep = []
+        for t in range(len(self._ids)):
+            if t not in matched:
+                self._missing[t] += 1
+            if self._missing[t] <= self.max_missing:
+                keep.append(t)
+        self._ids = [self._ids[t] for t in keep]
+        self._boxes = self._boxes[keep]
+        self._missing = [self._missing[t] for t in keep]
+
+        for d in range(len(boxes)):
+            if ids[d] is None:
+                ids[d] = self.next_id
+                self.next_id += 1
+                self._ids.append(ids[d])
+                self._boxes = np.vstack([self._boxes, boxes[d:d + 1]])
+                self._missing.append(0)
+        return ids
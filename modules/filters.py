@@ -0,0 +1,132 @@
+import math
+import numpy as np
+
+
+class OneEuroFilter:
+    """
+    One Euro filter (Casiez et al.) over whole arrays: every element of the
+    input (e.g. all 21 hand / 478 face landmarks, or a cursor position) is
+    filtered independently in one vectorized step.
+
+    Slow movement gets a low cutoff (no jitter), fast movement raises the
+    cutoff by beta * speed (little lag).
+
+    min_cutoff: Hz at rest, beta: cutoff increase per unit/s of speed,
+    d_cutoff: Hz of the speed estimate.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.0, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self._x = None
+        self._dx = None
+        self._t_ms = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, x, timestamp_ms):
+        x = np.asarray(x, dtype=np.float64)
+        if self._x is None or self._x.shape != x.shape:
+            self._x = x.copy()
+            self._dx = np.zeros_like(x)
+            self._t_ms = timestamp_ms
+            return x
+        if timestamp_ms <= self._t_ms:
+            return self._x.copy() # Same timestamp twice: nothing new to learn
+
+        dt = (timestamp_ms - self._t_ms) / 1000
+        self._t_ms = timestamp_ms
+
+        self._dx += self._alpha(self.d_cutoff, dt) * ((x - self._x) / dt - self._dx)
+
+        # Per-element cutoff from per-element speed
+        cutoff = self.min_cutoff + self.beta * np.abs(self._dx)
+        self._x += self._alpha(cutoff, dt) * (x - self._x)
+        return self._x.copy()
+
+
+class KalmanFilter:
+    """
+    Constant-velocity Kalman filter over whole arrays (each element is its own
+    position + velocity track).
+
+    All elements share dt and noise levels, so they also share one 2x2
+    covariance: a step costs a few array operations whatever the size.
+
+    process_noise: acceleration variance (units/s^2)^2,
+    measurement_noise: measurement variance (units^2).
+    """
+
+    def __init__(self, process_noise=1.0, measurement_noise=1e-4):
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.reset()
+
+    def reset(self):
+        self._x = None
+        self._v = None
+        self._P = None
+        self._t_ms = None
+
+    def __call__(self, x, timestamp_ms):
+        x = np.asarray(x, dtype=np.float64)
+        if self._x is None or self._x.shape != x.shape:
+            self._x = x.copy()
+            self._v = np.zeros_like(x)
+            self._P = np.array([[self.measurement_noise, 0.0], [0.0, 1.0]])
+            self._t_ms = timestamp_ms
+            return x
+        if timestamp_ms <= self._t_ms:
+            return self._x.copy()
+
+        dt = (timestamp_ms - self._t_ms) / 1000
+        self._t_ms = timestamp_ms
+
+        # Predict
+        F = np.array([[1.0, dt], [0.0, 1.0]])
+        q = self.process_noise
+        Q = q * np.array([[dt ** 4 / 4, dt ** 3 / 2], [dt ** 3 / 2, dt ** 2]])
+        self._x += self._v * dt
+        P = F @ self._P @ F.T + Q
+
+        # Update (we only measure position)
+        S = P[0, 0] + self.measurement_noise
+        k_pos, k_vel = P[0, 0] / S, P[1, 0] / S
+        innovation = x - self._x
+        self._x += k_pos * innovation
+        self._v += k_vel * innovation
+        self._P = np.array([[(1 - k_pos) * P[0, 0], (1 - k_pos) * P[0, 1]],
+                            [P[1, 0] - k_vel * P[0, 0], P[1, 1] - k_vel * P[0, 1]]])
+        return self._x.copy()
+
+
+FILTERS = {
+    "one_euro": OneEuroFilter,
+    "kalman": KalmanFilter,
+}
+
+
+def make_filter(config):
+    """
+    Builds a filter from a mode's config:
+    None / "none" -> None (no filtering), "one_euro" / "kalman" -> defaults,
+    {"type": "one_euro", "min_cutoff": 1.0, "beta": 0.01} -> with parameters.
+    """
+    if config is None:
+        return None
+    if isinstance(config, str):
+        config = {"type": config}
+    params = dict(config)
+    kind = params.pop("type", "one_euro")
+    if kind == "none":
+        return None
+    if kind not in FILTERS:
+        raise ValueError(f"Unknown filter type '{kind}', expected one of {sorted(FILTERS)} or 'none'")
+    return FILTERS[kind](**params)
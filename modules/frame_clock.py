@@ -0,0 +1,52 @@
+import cv2
+import time
+
+
+class FrameClock:
+    """
+    Stamps captured frames with their capture time in milliseconds.
+
+    MediaPipe's VIDEO / LIVE_STREAM modes need strictly increasing integer
+    timestamps, and the gesture timers need the real time between frames, so
+    every consumer should use the stamp taken at capture instead of counting
+    frames.
+
+    source:
+        "stream"    - use the capture's CAP_PROP_POS_MSEC (recorded video)
+        "monotonic" - use time.monotonic() at the moment of capture (webcams)
+        "auto"      - "stream" for files (they report a frame count), else "monotonic"
+    """
+
+    def __init__(self, cap=None, source="auto"):
+        if source == "auto":
+            is_file = cap is not None and cap.get(cv2.CAP_PROP_FRAME_COUNT) > 0
+            source = "stream" if is_file else "monotonic"
+        if source == "stream" and cap is None:
+            raise ValueError("FrameClock source 'stream' needs a capture object")
+
+        self.cap = cap
+        self.source = source
+        self._start = time.monotonic()
+        self.last_ms = -1
+
+    def stamp(self):
+        """Returns the timestamp (ms) for the frame that was just read."""
+        if self.source == "stream":
+            ms = int(self.cap.get(cv2.CAP_PROP_POS_MSEC))
+        else:
+            ms = int((time.monotonic() - self._start) * 1000)
+
+        # Never hand out the same (or an older) stamp twice
+        if ms <= self.last_ms:
+            ms = self.last_ms + 1
+        self.last_ms = ms
+        return ms
+
+    def monotonic(self, timestamp_ms, last_ms):
+        """
+        Timestamp for a consumer whose previous frame had last_ms: the given
+        capture stamp (a fresh stamp() when None), moved past last_ms if needed.
+        """
+        if timestamp_ms is None:
+            timestamp_ms = self.stamp()
+        return max(int(timestamp_ms), last_ms + 1)
@@ -0,0 +1,150 @@
+import cv2
+import glob
+import os
+import time
+
+from modules.capture import CaptureConfig, is_camera, open_camera
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+class VideoFileSource:
+    """
+    Replays a recorded video through the cv2.VideoCapture interface the rest
+    of the app uses (read / get / set / release / isOpened).
+
+    realtime=True paces read() to the file's own timestamps (native speed),
+    False returns frames as fast as they decode (benchmarks).
+    """
+
+    def __init__(self, path, realtime=True, loop=False):
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        self.cap = cv2.VideoCapture(path)
+        self._start = None
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self, image=None):
+        """image: optional buffer to decode into (like cv2.VideoCapture.read)"""
+        ret, frame = self.cap.read(image)
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            self._start = None
+            ret, frame = self.cap.read(image)
+        if ret and self.realtime:
+            self._wait(self.cap.get(cv2.CAP_PROP_POS_MSEC))
+        return ret, frame
+
+    def _wait(self, position_ms):
+        now = time.perf_counter()
+        if self._start is None:
+            self._start = now - position_ms / 1000
+        delay = self._start + position_ms / 1000 - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def restart_clock(self):
+        """Paces from the next frame on, e.g. after the app paused reading"""
+        self._start = None
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def set(self, prop, value):
+        # Size / fps of a recording can't be changed; ignore like cameras do
+        return False
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageSequenceSource:
+    """
+    Replays a directory (or glob) of still images as a video at the given fps.
+    Same interface as VideoFileSource; timestamps come from the frame index.
+    """
+
+    def __init__(self, pattern, fps=30, realtime=True, loop=False):
+        if os.path.isdir(pattern):
+            paths = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+        else:
+            paths = glob.glob(pattern)
+        self.paths = sorted(p for p in paths if p.lower().endswith(IMAGE_EXTENSIONS))
+        self.fps = fps
+        self.realtime = realtime
+        self.loop = loop
+        self.index = 0
+        self._size = None
+        self._start = None
+
+        if self.paths:
+            first = cv2.imread(self.paths[0])
+            if first is not None:
+                self._size = (first.shape[1], first.shape[0])
+
+    def isOpened(self):
+        return self._size is not None
+
+    def read(self, image=None):
+        # image (a buffer to reuse) is ignored: imread always allocates
+        if self.index >= len(self.paths):
+            if not self.loop or not self.paths:
+                return False, None
+            self.index = 0
+            self._start = None
+
+        frame = cv2.imread(self.paths[self.index])
+        if frame is None:
+            return False, None
+        if self.realtime:
+            now = time.perf_counter()
+            if self._start is None:
+                self._start = now - self.index / self.fps
+            delay = self._start + self.index / self.fps - now
+            if delay > 0:
+                time.sleep(delay)
+        self.index += 1
+        return True, frame
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return len(self.paths)
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            # Stamp of the frame returned by the last read()
+            return max(0, self.index - 1) * 1000 / self.fps
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return self.index
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_WIDTH and self._size:
+            return self._size[0]
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT and self._size:
+            return self._size[1]
+        return 0.0
+
+    def restart_clock(self):
+        self._start = None
+
+    def set(self, prop, value):
+        return False
+
+    def release(self):
+        self.paths = []
+
+
+def open_source(source, realtime=True, loop=False, fps=30, capture=None):
+    """
+    source: camera index ("0", 0) or device path, video file, image directory or glob.
+    Cameras are plain cv2.VideoCapture objects opened as capture (a
+    CaptureConfig) says; files replay at native speed unless realtime=False.
+    """
+    if is_camera(source):
+        return open_camera(capture or CaptureConfig(), device=source)
+    if os.path.isdir(source) or any(ch in source for ch in "*?["):
+        return ImageSequenceSource(source, fps=fps, realtime=realtime, loop=loop)
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"Frame source not found: {source}")
+    return VideoFileSource(source, realtime=realtime, loop=loop)
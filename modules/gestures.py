@@ -0,0 +1,147 @@
+import numpy as np
+
+# Per-hand features exposed to gesture definitions, as "<slot>.<feature>"
+# (e.g. "click.pinch", "mouse.curl_index"). A missing hand has present == 0
+# and NaN everywhere else, so any predicate on it fails.
+HAND_FEATURES = ("present", "curl_index", "curl_middle", "curl_ring", "curl_pinky", "folded", "pinch")
+HAND_SLOTS = ("mouse", "click") # Physical right hand moves, physical left hand clicks
+
+# Default release margin per feature kind (see Gesture.hysteresis)
+HYSTERESIS = {"curl": 0.1, "pinch": 5.0}
+
+
+def feature_names(slots=HAND_SLOTS):
+    return tuple(f"{slot}.{name}" for slot in slots for name in HAND_FEATURES)
+
+
+def feature_vector(features, hands, slots=HAND_SLOTS):
+    """
+    features: HandFeatures of the frame, hands: {slot: hand index or None}.
+    Returns the flat float32 vector matching feature_names(slots).
+    """
+    n = len(HAND_FEATURES)
+    vector = np.full(len(slots) * n, np.nan, dtype=np.float32)
+    for k, slot in enumerate(slots):
+        i = hands.get(slot)
+        base = k * n
+        if i is None:
+            vector[base] = 0.0
+            continue
+        vector[base] = 1.0
+        vector[base + 1:base + 5] = features.curl[i]
+        vector[base + 5] = features.folded[i]
+        vector[base + 6] = features.pinch[i]
+    return vector
+
+
+class Gesture:
+    """
+    One row of the gesture table.
+
+    when: {feature: (low, high)}, every feature must be inside its bounds
+          (None = unbounded), e.g. {"click.pinch": (None, 30)}
+    hold_ms: how long the predicates must hold before "down" fires
+    hysteresis: {feature: margin} to widen the bounds by once the gesture is
+                matched, so it doesn't flicker at the threshold
+    """
+
+    def __init__(self, name, when, hold_ms=0, hysteresis=None):
+        self.name = name
+        self.when = when
+        self.hold_ms = hold_ms
+        self.hysteresis = hysteresis or {}
+
+    def margin(self, feature):
+        if feature in self.hysteresis:
+            return self.hysteresis[feature]
+        kind = feature.split(".")[-1]
+        for prefix, margin in HYSTERESIS.items():
+            if kind.startswith(prefix):
+                return margin
+        return 0.0
+
+
+class GestureEngine:
+    """
+    Evaluates a table of Gesture definitions against one feature vector per frame.
+
+    The table is compiled into (gestures x features) bound matrices, so a frame
+    costs one vectorized comparison whatever the number of gestures.
+
+    update() returns debounced events as (name, kind) tuples:
+    "down" once the gesture has held for hold_ms, "hold" on every later frame
+    while it still matches, and "up" when it is released.
+    """
+
+    def __init__(self, gestures, names=None):
+        self.gestures = list(gestures)
+        self.feature_names = tuple(names or feature_names())
+        self._index = {g.name: i for i, g in enumerate(self.gestures)}
+        columns = {name: i for i, name in enumerate(self.feature_names)}
+
+        shape = (len(self.gestures), len(self.feature_names))
+        self._lo = np.full(shape, -np.inf, dtype=np.float32)
+        self._hi = np.full(shape, np.inf, dtype=np.float32)
+        self._release_lo = self._lo.copy()
+        self._release_hi = self._hi.copy()
+        self._constrained = np.zeros(shape, dtype=bool)
+
+        for g, gesture in enumerate(self.gestures):
+            for feature, (lo, hi) in gesture.when.items():
+                if feature not in columns:
+                    raise ValueError(f"Unknown gesture feature '{feature}' in '{gesture.name}'")
+                f = columns[feature]
+                margin = gesture.margin(feature)
+                self._constrained[g, f] = True
+                if lo is not None:
+                    self._lo[g, f] = lo
+                    self._release_lo[g, f] = lo - margin
+                if hi is not None:
+                    self._hi[g, f] = hi
+                    self._release_hi[g, f] = hi + margin
+
+        self._hold_ms = np.array([g.hold_ms for g in self.gestures], dtype=np.float64)
+        self._start_ms = np.full(len(self.gestures), np.nan)
+        self.matched = np.zeros(len(self.gestures), dtype=bool) # Predicates hold right now
+        self.active = np.zeros(len(self.gestures), dtype=bool) # "down" fired and not released yet
+
+    def update(self, vector, timestamp_ms):
+        """vector: feature vector of the frame (see feature_vector). Returns the list of events."""
+        # Matched gestures are checked against the wider release bounds
+        held_before = self.matched[:, None]
+        lo = np.where(held_before, self._release_lo, self._lo)
+        hi = np.where(held_before, self._release_hi, self._hi)
+        with np.errstate(invalid="ignore"):
+            inside = (vector >= lo) & (vector <= hi)
+        matched = np.all(inside | ~self._constrained, axis=1)
+
+        self._start_ms[matched & ~self.matched] = timestamp_ms
+        self._start_ms[~matched] = np.nan
+        with np.errstate(invalid="ignore"):
+            held = matched & (timestamp_ms - self._start_ms >= self._hold_ms)
+
+        up = self.active & ~held
+        down = held & ~self.active
+        hold = held & self.active
+        self.matched = matched
+        self.active = held
+
+        events = [(self.gestures[i].name, "up") for i in np.flatnonzero(up)]
+        events += [(self.gestures[i].name, "down") for i in np.flatnonzero(down)]
+        events += [(self.gestures[i].name, "hold") for i in np.flatnonzero(hold)]
+        return events
+
+    def is_matched(self, name):
+        return bool(self.matched[self._index[name]])
+
+    def is_active(self, name):
+        return bool(self.active[self._index[name]])
+
+    def progress(self, name, timestamp_ms):
+        """0..1 of the way through the hold time (0 when not matched)"""
+        i = self._index[name]
+        if not self.matched[i]:
+            return 0.0
+        if self._hold_ms[i] <= 0:
+            return 1.0
+        return min(1.0, (timestamp_ms - self._start_ms[i]) / self._hold_ms[i])
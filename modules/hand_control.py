@@ -2,234 +2,372 @@ import cv2
 import numpy as np
 import mediapipe as mp
 import pyautogui
-import time
 import os
 
+from modules.face_service import FaceInferenceService
+from modules.filters import make_filter
+from modules.frame_clock import FrameClock
+from modules.cursor import CursorEngine
+from modules.input_dispatcher import InputDispatcher
+from modules.gestures import Gesture, GestureEngine, feature_vector
+from modules.landmarks import HandFeatures, hands_to_array, largest_face, INDEX_TIP, WRIST
+from modules.profiler import profiler
+from modules.roi import RoiTracker
+from modules.ui import OverlayCache
+
 class HandControlMode:
-    def __init__(self):
+    def __init__(self, live_stream=False, face_service=None, gaze_check_interval=10, gaze_ttl_ms=1000,
+                 roi=False, frame_budget_ms=None, input_dispatcher=None, cursor_rate_hz=120,
+                 filters=None, hand_landmarker=None, recorder=None):
+        # live_stream: run the landmarker with detect_async and act on the newest
+        # completed result instead of blocking on every frame
+        # face_service: shared FaceInferenceService used for Gaze Safety
+        # gaze_check_interval / gaze_ttl_ms: how often the face check runs (frames) and
+        # how long its answer stays valid (ms); clicks always force a fresh check
+        # roi / frame_budget_ms: crop hand inference around last frame's hands and
+        # lower its resolution while inference runs over budget (see RoiTracker)
+        # input_dispatcher: shared InputDispatcher that sends mouse input off the vision thread
+        # cursor_rate_hz: how often the CursorEngine moves the cursor between frames
+        # filters: {"landmarks": config, "cursor": config} overrides, see make_filter()
+        # hand_landmarker: use this instead of loading the model (e.g. LandmarkRecording replay)
+        # recorder: LandmarkRecorder that gets every hand result
+        self.live_stream = live_stream and hand_landmarker is None
+        self._latest_hand_result = None
+        self.recorder = recorder
+        self.roi = RoiTracker(max_objects=2, budget_ms=frame_budget_ms) if roi else None
+
         # Mediapipe Tasks API setup
         BaseOptions = mp.tasks.BaseOptions
         HandLandmarker = mp.tasks.vision.HandLandmarker
         HandLandmarkerOptions = mp.tasks.vision.HandLandmarkerOptions
         VisionRunningMode = mp.tasks.vision.RunningMode
 
-        # Create a hand landmarker instance with the video mode:
+        # Create a hand landmarker instance with the video (or live stream) mode:
+        running_mode = VisionRunningMode.LIVE_STREAM if self.live_stream else VisionRunningMode.VIDEO
         model_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models', 'hand_landmarker.task')
         
-        # Check if model exists
-        if not os.path.exists(model_path):
-             raise FileNotFoundError(f"Model file not found at {model_path}. Please run check_models.py or tools/download_model.py")
-
-        options = HandLandmarkerOptions(
-            base_options=BaseOptions(model_asset_path=model_path),
-            running_mode=VisionRunningMode.VIDEO,
-            num_hands=2, # Enable 2 hands detection
-            min_hand_detection_confidence=0.5,
-            min_hand_presence_confidence=0.5,
-            min_tracking_confidence=0.5)
-        
-        self.landmarker = HandLandmarker.create_from_options(options)
+        if hand_landmarker is not None:
+            self.landmarker = hand_landmarker
+        else:
+            # Check if model exists
+            if not os.path.exists(model_path):
+                 raise FileNotFoundError(f"Model file not found at {model_path}. Please run check_models.py or tools/download_model.py")
+
+            options = HandLandmarkerOptions(
+                base_options=BaseOptions(model_asset_path=model_path),
+                running_mode=running_mode,
+                num_hands=2, # Enable 2 hands detection
+                min_hand_detection_confidence=0.5,
+                min_hand_presence_confidence=0.5,
+                min_tracking_confidence=0.5,
+                result_callback=self._on_hand_result if self.live_stream else None)
+            
+            self.landmarker = HandLandmarker.create_from_options(options)
 
         # Helper for Face Detection (Gaze Safety)
-        FaceLandmarker = mp.tasks.vision.FaceLandmarker
-        FaceLandmarkerOptions = mp.tasks.vision.FaceLandmarkerOptions
-        
-        face_model_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models', 'face_landmarker.task')
-        if not os.path.exists(face_model_path):
-             # Fallback if not downloaded, though we expect it is
-             print("Face model not found, Gaze Safety disabled.")
-             self.face_landmarker = None
-        else:
-            face_options = FaceLandmarkerOptions(
-                base_options=BaseOptions(model_asset_path=face_model_path),
-                running_mode=VisionRunningMode.VIDEO,
-                num_faces=1,
-                min_face_detection_confidence=0.5,
-                min_face_presence_confidence=0.5,
-                min_tracking_confidence=0.5)
-            self.face_landmarker = FaceLandmarker.create_from_options(face_options)
+        self._owns_face_service = face_service is None
+        # Gaze state is cached between checks (see _update_gaze)
+        self.gaze_check_interval = gaze_check_interval
+        self.gaze_ttl_ms = gaze_ttl_ms
+        self.gaze_roi_change = 25 # Mean gray-level change of the face thumbnail that forces a recheck
+        self._gaze_ok = False
+        self._gaze_checked_ms = None
+        self._frames_since_gaze_check = 0
+        self._face_box = None
+        self._face_thumb = None
+        if face_service is None:
+            try:
+                face_service = FaceInferenceService(num_faces=1, live_stream=live_stream)
+            except FileNotFoundError:
+                # Fallback if not downloaded, though we expect it is
+                print("Face model not found, Gaze Safety disabled.")
+        self.face_service = face_service
+        self._replay = getattr(self.landmarker, "replay", False) and getattr(face_service, "replay", True)
+
+        self._owns_input = input_dispatcher is None
+        self.input = input_dispatcher or InputDispatcher()
 
         self.screen_w, self.screen_h = pyautogui.size()
         self.frame_margin = 100 # Frame reduction for mouse movement
-        self.prev_x, self.prev_y = 0, 0
-        self.smoothening = 5
-        self.timestamp_ms = 0
+        # Landmarks are filtered per hand before gesture features are computed,
+        # the cursor target once more on the cursor thread (see modules/filters.py)
+        self.filters = {
+            "landmarks": {"type": "one_euro", "min_cutoff": 2.0, "beta": 10.0}, # Normalized units
+            "cursor": {"type": "one_euro", "min_cutoff": 1.0, "beta": 0.01}, # Screen pixels
+        }
+        self.filters.update(filters or {})
+        self._landmark_filters = {} # (Handedness label, n-th hand with it) -> filter
+
+        # Smoothing / prediction happen on the cursor thread at cursor_rate_hz
+        cursor_filter = make_filter(self.filters["cursor"])
+        self.cursor = CursorEngine(self.input, rate_hz=cursor_rate_hz, smoothening=2 if cursor_filter else 5,
+                                   target_filter=cursor_filter)
+        self.timestamp_ms = -1 # Stamp of the last processed frame
+        self.clock = FrameClock() # Fallback when callers don't pass a capture stamp
         
         # State for click dragging
         self.is_left_clicking = False
+        self.pinch_threshold = 30 # Pixels between thumb and index tips
         
         # State for Right Click (Hold to trigger)
-        self.right_click_start_time = 0
+        self.right_click_hold_ms = 500
         self.right_click_triggered = False
+
+        # Gesture table: add a row here (and an action below) for a new gesture
+        self.gestures = GestureEngine([
+            Gesture("drag", {"click.pinch": (None, self.pinch_threshold)}),
+            Gesture("right_click", {"mouse.folded": (3, None), "click.folded": (3, None)},
+                    hold_ms=self.right_click_hold_ms),
+        ])
+        # (gesture, event) -> handler(frame, clicks_enabled)
+        self.actions = {
+            ("drag", "down"): self._start_drag,
+            ("drag", "hold"): self._start_drag,
+            ("drag", "up"): self._end_drag,
+            ("right_click", "down"): self._right_click,
+            ("right_click", "hold"): self._right_click,
+            ("right_click", "up"): self._end_right_click,
+        }
         
+        self.overlays = OverlayCache()
+
         # Configure pyautogui for speed
         pyautogui.PAUSE = 0
         pyautogui.FAILSAFE = False # Be careful with this, but prevents some interruptions
 
-    def process(self, frame):
+    def close(self):
+        """Releases the landmarker (and the face service / input dispatcher if we created them)"""
+        self.landmarker.close()
+        if self._owns_face_service and self.face_service:
+            self.face_service.close()
+        self.cursor.close()
+        if self.is_left_clicking:
+            self.input.mouse_up() # Don't leave the button held down
+        if self._owns_input:
+            self.input.close()
+
+    def _on_hand_result(self, result, output_image, timestamp_ms):
+        """LIVE_STREAM callback: keep only the newest hand result"""
+        if self.roi and not self.roi.finish(result.hand_landmarks, timestamp_ms):
+            return # Miss caused by moving the crop window: keep the previous result
+        self._latest_hand_result = result
+
+    @profiler.timed("hand.process")
+    def process(self, frame, timestamp_ms=None, frame_id=None):
+        """timestamp_ms: capture time of the frame (see FrameClock), frame_id: pipeline frame number"""
         h, w, c = frame.shape
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
+        if self._replay:
+            rgb_frame = mp_image = None # Recorded landmarks don't need the image
+        else:
+            with profiler.stage("hand.convert"):
+                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
         
-        # Calculate timestamp 
-        self.timestamp_ms += int(1000/30) 
+        # MediaPipe needs strictly increasing timestamps
+        self.timestamp_ms = self.clock.monotonic(timestamp_ms, self.timestamp_ms)
         
-        # 1. Detect Face for Gaze Safety
-        is_looking_at_screen = True # Default to true if detection fails or is disabled
-        if self.face_landmarker:
-            face_result = self.face_landmarker.detect_for_video(mp_image, self.timestamp_ms)
-            if face_result.face_landmarks:
-                # Simple Gaze Check: Is face roughly frontal?
-                # We can check relation of Nose Tip (1) to Ears or Eyes.
-                # Let's use Nose (1) vs Checkbones (Left: 234, Right: 454)
-                landmarks = face_result.face_landmarks[0]
-                nose_x = landmarks[1].x
-                left_cheek_x = landmarks[234].x
-                right_cheek_x = landmarks[454].x
-                
-                # If nose is not between cheeks, we are turning away significantly
-                # Also checks vertical (Nose 1 vs Chin 152 vs Forehead 10)
-                
-                # Check Horizontal
-                if not (right_cheek_x < nose_x < left_cheek_x): # Note: Coordinates might be flipped depending on mirror
-                     # Actually in MP normalized coordinates: 0 is Left, 1 is Right.
-                     # Left Cheek (234) should be > Right Cheek (454) in x? 
-                     # Let's rely on a simpler metric: Face Presence implies looking roughly at camera 
-                     # if we enforce high tracking confidence? 
-                     # User wants "If I am seeing the screen".
-                     # Let's stick to "Face Detected" = "Looking at screen" for now, 
-                     # but maybe visualize it.
-                     pass
-                
-                # Better: Check yaw via eye-box?
-                # Let's assume Valid Face = Looking At Screen for this iteration.
-                is_looking_at_screen = True
-                
-                # Visual Feedback for Gaze
-                cv2.rectangle(frame, (10, 10), (w-10, h-10), (0, 255, 0), 2)
-                cv2.putText(frame, "Gaze Detected: Clicks Enabled", (w//2 - 150, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-            else:
-                is_looking_at_screen = False
-                cv2.putText(frame, "Gaze NOT Detected: Clicks Disabled", (w//2 - 180, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-
-        # 2. Detect Hands
-        detection_result = self.landmarker.detect_for_video(mp_image, self.timestamp_ms)
+        # 1. Detect Hands (optionally on a crop around last frame's hands)
+        hand_image = mp_image
+        if self.roi:
+            hand_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=self.roi.prepare(rgb_frame, self.timestamp_ms))
+
+        if self.live_stream:
+            # Don't wait: use whatever the newest finished inference is
+            with profiler.stage("hand.submit"):
+                self.landmarker.detect_async(hand_image, self.timestamp_ms)
+            detection_result = self._latest_hand_result
+        else:
+            with profiler.stage("hand.detect"):
+                detection_result = self.landmarker.detect_for_video(hand_image, self.timestamp_ms)
+            if self.roi and not self.roi.finish(detection_result.hand_landmarks, self.timestamp_ms):
+                detection_result = self._latest_hand_result # Miss caused by moving the crop window
+            self._latest_hand_result = detection_result
+
+        if self.recorder:
+            self.recorder.record_hands(self.timestamp_ms, frame_id if frame_id is not None else self.timestamp_ms, detection_result)
 
         # Draw Active Region Box
         cv2.rectangle(frame, (self.frame_margin, self.frame_margin), (w - self.frame_margin, h - self.frame_margin), (255, 0, 255), 2)
 
-        # Visual feedback instructions
-        cv2.putText(frame, "Right Hand: Move", (10, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-        cv2.putText(frame, "Left Hand: Click / Drag", (10, 75), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
-        cv2.putText(frame, "Both Fists: Right Click", (10, 100), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+        # Visual feedback instructions (static text, cached sprite)
+        self.overlays.draw(frame, "instructions", self._render_instructions)
 
-        # Identify Hands
-        mouse_hand = None # Physical Right (MP Left)
-        click_hand = None # Physical Left (MP Right)
+        # Identify Hands: one (H, 21, 3) array per frame, features computed in one batch
+        points = hands_to_array(detection_result.hand_landmarks if detection_result else None)
+        mouse_hand = None # Index of Physical Right (MP Left)
+        click_hand = None # Index of Physical Left (MP Right)
         
-        if detection_result.hand_landmarks:
-            for i, hand_landmarks in enumerate(detection_result.hand_landmarks):
-                handedness = detection_result.handedness[i][0]
-                category_name = handedness.category_name
-                
-                self._draw_landmarks(frame, hand_landmarks)
-                
-                if category_name == "Left":
-                    mouse_hand = hand_landmarks
-                elif category_name == "Right":
-                    click_hand = hand_landmarks
-
-        # --- Dual Hand Gesture: Right Click (Both Fists) ---
-        is_right_clicking_gesture = False
-        if mouse_hand and click_hand:
-            if self._is_fist(mouse_hand) and self._is_fist(click_hand):
-                is_right_clicking_gesture = True
-                
-        if is_right_clicking_gesture:
-             # Handle Right Click Hold
-            if self.right_click_start_time == 0:
-                self.right_click_start_time = time.time()
-            
-            elapsed = time.time() - self.right_click_start_time
+        labels = [detection_result.handedness[i][0].category_name for i in range(len(points))]
+        self._filter_landmarks(points, labels)
+        features = HandFeatures(points, w, h)
+
+        for i, category_name in enumerate(labels):
+            self._draw_landmarks(frame, points[i])
             
-            # Draw shared progress bar in center
+            if category_name == "Left":
+                mouse_hand = i
+            elif category_name == "Right":
+                click_hand = i
+
+        with profiler.stage("hand.gestures"):
+            events = self.gestures.update(feature_vector(features, {"mouse": mouse_hand, "click": click_hand}), self.timestamp_ms)
+        is_right_clicking_gesture = self.gestures.is_matched("right_click")
+
+        # 2. Gaze Safety (face check at reduced cadence, forced when a click is about to happen)
+        click_starting = ((self.gestures.is_matched("drag") and not self.is_left_clicking)
+                          or (is_right_clicking_gesture and not self.right_click_triggered))
+
+        with profiler.stage("hand.gaze"):
+            is_looking_at_screen = self._update_gaze(frame, mp_image, frame_id, click_starting)
+
+        # --- Dual Hand Gesture: Right Click (Both Fists) progress ---
+        if is_right_clicking_gesture:
             cx, cy = w // 2, h // 2
             bar_width = 200
-            filled_width = int((elapsed / 0.5) * bar_width)
+            filled_width = int(self.gestures.progress("right_click", self.timestamp_ms) * bar_width)
             cv2.rectangle(frame, (cx - 100, cy - 60), (cx + 100, cy - 40), (100, 100, 100), -1)
-            cv2.rectangle(frame, (cx - 100, cy - 60), (cx - 100 + min(filled_width, bar_width), cy - 40), (0, 0, 255), -1)
+            cv2.rectangle(frame, (cx - 100, cy - 60), (cx - 100 + filled_width, cy - 40), (0, 0, 255), -1)
             cv2.putText(frame, "Right Click...", (cx - 60, cy - 70), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0,0,255), 2)
-            
-            if elapsed > 0.5 and not self.right_click_triggered:
-                if is_looking_at_screen: # Gaze Safety Check
-                   pyautogui.click(button='right')
-                   self.right_click_triggered = True
-                   cv2.putText(frame, "CLICK!", (cx - 40, cy), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 3)
-        else:
-            self.right_click_start_time = 0
-            self.right_click_triggered = False
+
+        # 3. Gesture events -> actions
+        for event in events:
+            # Both fists take over the hands: only let other gestures release
+            if is_right_clicking_gesture and event[0] != "right_click" and event[1] != "up":
+                continue
+            action = self.actions.get(event)
+            if action:
+                action(frame, is_looking_at_screen)
 
         # --- Individual Hand Processing ---
         # Only process if we are NOT currently right clicking (to avoid conflict)
+        if is_right_clicking_gesture or mouse_hand is None:
+            self.cursor.release() # Hold the cursor still
+
         if not is_right_clicking_gesture:
-            if mouse_hand:
-                 self._handle_right_hand(mouse_hand, frame, w, h)
-                 cv2.putText(frame, "Mouse", (int(mouse_hand[0].x * w), int(mouse_hand[0].y * h) - 20), 
+            if mouse_hand is not None:
+                 wrist = points[mouse_hand, WRIST]
+                 self._handle_right_hand(points[mouse_hand], frame, w, h)
+                 cv2.putText(frame, "Mouse", (int(wrist[0] * w), int(wrist[1] * h) - 20), 
                                 cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
                                 
-            if click_hand:
-                 self._handle_left_hand(click_hand, frame, w, h, is_looking_at_screen)
-                 cv2.putText(frame, "Clicks", (int(click_hand[0].x * w), int(click_hand[0].y * h) - 20), 
+            if click_hand is not None:
+                 wrist = points[click_hand, WRIST]
+                 if self.is_left_clicking:
+                     index = points[click_hand, INDEX_TIP]
+                     cv2.circle(frame, (int(index[0] * w), int(index[1] * h)), 15, (0, 255, 255), cv2.FILLED)
+                 cv2.putText(frame, "Clicks", (int(wrist[0] * w), int(wrist[1] * h) - 20), 
                                 cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 2)
 
         return frame
 
-    def _is_fist(self, landmarks):
-        """Check if hand is in a fist state (Fingertips below PIP joints)"""
-        # Fingertip IDs: 8, 12, 16, 20 (Index, Middle, Ring, Pinky)
-        # PIP Joint IDs: 6, 10, 14, 18
-        # Thumb is exception, we ignore it for simple fist check or check if tucked.
-        
-        # We assume hand is upright. If y of tip > y of pip, it's folded down (in image coords, y increases downwards)
-        # So Tip.y > Pip.y means finger is curled? 
-        # Yes, since 0,0 is top-left. Lower on screen = higher Y value.
-        # So curled finger tip is lower (higher Y) than knuckle/pip? 
-        # Actually, usually Tip is "below" PIP in a fist if palm faces camera?
-        # Let's use distance to wrist (0).
-        # Fist: Distance(Tip, Wrist) < Distance(PIP, Wrist) roughly?
-        # Or simpler: Tip.y > PIP.y (if hand is pointing up).
-        
-        # Let's use a robust heuristic: Finger Tips are close to Wrist
-        wrist = landmarks[0]
-        tips = [8, 12, 16, 20]
-        pips = [6, 10, 14, 18]
-        
-        fingers_folded = 0
-        for i in range(4):
-            # Distance check is rotation invariant-ish
-            tip_pt = landmarks[tips[i]]
-            pip_pt = landmarks[pips[i]]
-            
-            d_tip = np.hypot(tip_pt.x - wrist.x, tip_pt.y - wrist.y)
-            d_pip = np.hypot(pip_pt.x - wrist.x, pip_pt.y - wrist.y)
-            
-            if d_tip < d_pip:
-                fingers_folded += 1
-                
-        return fingers_folded >= 3 # At least 3 fingers folded (excluding thumb)
+    def _filter_landmarks(self, points, labels):
+        """
+        Filters each hand's (21, 3) landmarks in place, one filter per slot:
+        (handedness, n-th hand with it), so two hands with the same label
+        (misclassified, or two people) don't share one filter.
+        """
+        slots = [(label, labels[:i].count(label)) for i, label in enumerate(labels)]
+        for slot in list(self._landmark_filters):
+            if slot not in slots:
+                del self._landmark_filters[slot] # Hand left: start fresh when it comes back
+        if self.filters["landmarks"] is None:
+            return
+        for i, slot in enumerate(slots):
+            landmark_filter = self._landmark_filters.get(slot)
+            if landmark_filter is None:
+                landmark_filter = self._landmark_filters[slot] = make_filter(self.filters["landmarks"])
+            points[i] = landmark_filter(points[i], self.timestamp_ms)
+
+    def _update_gaze(self, frame, mp_image, frame_id, click_starting):
+        """
+        Gaze Safety: returns True if clicks are allowed.
+
+        The face landmarker only runs every gaze_check_interval frames, when the
+        cached answer is older than gaze_ttl_ms, or when a click gesture is
+        starting. In between, a tiny thumbnail of the face box is compared with
+        the one from the last check; a big change (face left / turned) forces a
+        fresh check right away.
+        """
+        if not self.face_service:
+            return True # Default to true if detection is disabled
+
+        h, w, _ = frame.shape
+        self._frames_since_gaze_check += 1
+
+        needs_check = (
+            self._gaze_checked_ms is None
+            or self._frames_since_gaze_check >= self.gaze_check_interval
+            or self.timestamp_ms - self._gaze_checked_ms > self.gaze_ttl_ms
+            or (click_starting and self.timestamp_ms - self._gaze_checked_ms > 0)
+        )
+        if not needs_check and self._face_box is not None:
+            thumb = self._face_thumbnail(frame, self._face_box)
+            if thumb is None or np.mean(cv2.absdiff(thumb, self._face_thumb)) > self.gaze_roi_change:
+                needs_check = True
+
+        if needs_check:
+            face_result = self.face_service.detect(mp_image, self.timestamp_ms, frame_id)
+            self._gaze_checked_ms = self.timestamp_ms
+            self._frames_since_gaze_check = 0
+
+            # Let's assume Valid Face = Looking At Screen for this iteration.
+            # (Nose vs cheek yaw checks were too flip-dependent to be reliable.)
+            self._gaze_ok = bool(face_result and face_result.face_landmarks)
+            self._face_box = None
+            if self._gaze_ok:
+                landmarks = face_result.face_landmarks[largest_face(face_result.face_landmarks)]
+                xs = [landmarks[i].x for i in (10, 152, 234, 454)] # Forehead, chin, cheeks
+                ys = [landmarks[i].y for i in (10, 152, 234, 454)]
+                box = (int(min(xs) * w), int(min(ys) * h), int(max(xs) * w), int(max(ys) * h))
+                self._face_thumb = self._face_thumbnail(frame, box)
+                if self._face_thumb is not None:
+                    self._face_box = box
 
-    def _draw_landmarks(self, frame, landmarks):
+        # Visual Feedback for Gaze
+        if self._gaze_ok:
+            cv2.rectangle(frame, (10, 10), (w-10, h-10), (0, 255, 0), 2)
+        self.overlays.draw(frame, ("gaze", self._gaze_ok), self._render_gaze_ok if self._gaze_ok else self._render_gaze_lost)
+
+        return self._gaze_ok
+
+    # Static overlays, rendered once per frame size (see OverlayCache).
+    # Thin full-frame rectangles stay direct draws: a frame-sized masked copy costs more.
+    def _render_instructions(self, canvas):
+        cv2.putText(canvas, "Right Hand: Move", (10, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+        cv2.putText(canvas, "Left Hand: Click / Drag", (10, 75), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+        cv2.putText(canvas, "Both Fists: Right Click", (10, 100), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+
+    def _render_gaze_ok(self, canvas):
+        w = canvas.shape[1]
+        cv2.putText(canvas, "Gaze Detected: Clicks Enabled", (w//2 - 150, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+
+    def _render_gaze_lost(self, canvas):
+        w = canvas.shape[1]
+        cv2.putText(canvas, "Gaze NOT Detected: Clicks Disabled", (w//2 - 180, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+
+    def _face_thumbnail(self, frame, box):
+        """Small grayscale patch of the face box, used as a cheap presence tracker"""
+        x1, y1, x2, y2 = box
+        h, w, _ = frame.shape
+        x1, y1 = max(0, x1), max(0, y1)
+        x2, y2 = min(w, x2), min(h, y2)
+        if x2 - x1 < 8 or y2 - y1 < 8:
+            return None
+        patch = cv2.resize(frame[y1:y2, x1:x2], (16, 16), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(patch, cv2.COLOR_BGR2GRAY)
+
+    def _draw_landmarks(self, frame, points):
+        """points: (21, 3) normalized landmark array of one hand"""
         h, w, _ = frame.shape
-        for pt in landmarks:
-            x = int(pt.x * w)
-            y = int(pt.y * h)
-            cv2.circle(frame, (x, y), 5, (200, 200, 200), -1)
+        pixels = (points[:, :2] * (w, h)).astype(np.int32)
+        for x, y in pixels:
+            cv2.circle(frame, (int(x), int(y)), 5, (200, 200, 200), -1)
 
-    def _handle_right_hand(self, landmarks, frame, w, h):
+    def _handle_right_hand(self, points, frame, w, h):
         """Right Hand: Controls Mouse Movement"""
         # Index finger tip (ID 8)
-        index_x = int(landmarks[8].x * w)
-        index_y = int(landmarks[8].y * h)
+        index_x = int(points[INDEX_TIP, 0] * w)
+        index_y = int(points[INDEX_TIP, 1] * h)
         
         cv2.circle(frame, (index_x, index_y), 10, (0, 255, 0), cv2.FILLED) 
 
@@ -237,39 +375,32 @@ class HandControlMode:
         curr_x = np.interp(index_x, (self.frame_margin, w - self.frame_margin), (0, self.screen_w))
         curr_y = np.interp(index_y, (self.frame_margin, h - self.frame_margin), (0, self.screen_h))
         
-        # Smoothing
-        curr_x = self.prev_x + (curr_x - self.prev_x) / self.smoothening
-        curr_y = self.prev_y + (curr_y - self.prev_y) / self.smoothening
+        # The cursor thread smooths / extrapolates towards it between frames
+        self.cursor.set_target(curr_x, curr_y, self.timestamp_ms)
 
-        self.prev_x, self.prev_y = curr_x, curr_y
+    # --- Gesture actions ---
+    def _start_drag(self, frame, clicks_enabled):
+        """Left Click / Drag (Index + Thumb pinch on the left hand)"""
+        if not clicks_enabled:
+            return
+        if not self.is_left_clicking:
+            self.input.mouse_down()
+            self.is_left_clicking = True
+        cv2.putText(frame, "Dragging", (50, 200), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
 
-        try:
-             pyautogui.moveTo(curr_x, curr_y)
-        except pyautogui.FailSafeException:
-             pass
+    def _end_drag(self, frame, clicks_enabled):
+        if self.is_left_clicking:
+            self.input.mouse_up()
+            self.is_left_clicking = False
 
-    def _handle_left_hand(self, landmarks, frame, w, h, clicks_enabled):
-        """Left Hand: Controls Clicks (Mapped from MP 'Right' in mirror mode)"""
-        if not clicks_enabled:
-             return
+    def _right_click(self, frame, clicks_enabled):
+        """Both fists held for right_click_hold_ms"""
+        if self.right_click_triggered or not clicks_enabled: # Gaze Safety Check
+            return
+        self.input.click(button='right')
+        self.right_click_triggered = True
+        h, w, _ = frame.shape
+        cv2.putText(frame, "CLICK!", (w // 2 - 40, h // 2), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 3)
 
-        # Thumb tip (ID 4)
-        thumb_x = int(landmarks[4].x * w)
-        thumb_y = int(landmarks[4].y * h)
-        
-        # Index tip (ID 8)
-        index_x = int(landmarks[8].x * w)
-        index_y = int(landmarks[8].y * h)
-        
-        # --- Gesture 1: Left Click / Drag (Index + Thumb) ---
-        dist_left = np.hypot(index_x - thumb_x, index_y - thumb_y)
-        if dist_left < 30:
-            cv2.circle(frame, (index_x, index_y), 15, (0, 255, 255), cv2.FILLED) 
-            if not self.is_left_clicking:
-                pyautogui.mouseDown()
-                self.is_left_clicking = True
-            cv2.putText(frame, "Dragging", (50, 200), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
-        else:
-            if self.is_left_clicking:
-                pyautogui.mouseUp()
-                self.is_left_clicking = False
+    def _end_right_click(self, frame, clicks_enabled):
+        self.right_click_triggered = False
@@ -0,0 +1,198 @@
+import json
+import os
+
+import numpy as np
+
+# Face mesh landmarks of each eye: outer corner, inner corner, iris center
+RIGHT_EYE = (33, 133, 468) # Subject's right eye (left in the mirrored frame)
+LEFT_EYE = (263, 362, 473)
+
+def user_config_dir():
+    """Per-user settings directory: %APPDATA%\\gesture on Windows, $XDG_CONFIG_HOME/gesture (~/.config) elsewhere"""
+    base = os.environ.get("APPDATA") if os.name == "nt" else os.environ.get("XDG_CONFIG_HOME")
+    return os.path.join(base or os.path.join(os.path.expanduser("~"), ".config"), "gesture")
+
+
+# Calibrations belong to a user, not to the repo
+DEFAULT_CALIBRATION_PATH = os.path.join(user_config_dir(), 'head_pose_calibration.json')
+
+# 3x3 grid of calibration targets, normalized screen coordinates
+GRID = np.array([(x, y) for y in (0.05, 0.5, 0.95) for x in (0.05, 0.5, 0.95)], dtype=np.float32)
+
+
+def head_angles(matrix):
+    """
+    (yaw, pitch) in degrees from a 4x4 facial transformation matrix, signed like
+    the mirrored frame / the screen: yaw > 0 turns right, pitch > 0 tilts down.
+    None for a missing (all zero) matrix, e.g. replay of a recording without one.
+    """
+    rotation = np.asarray(matrix, dtype=np.float32)[:3, :3]
+    if not rotation.any():
+        return None
+    forward = rotation[:, 2] # Where the face points, in camera space
+    yaw = np.degrees(np.arctan2(forward[0], forward[2]))
+    pitch = -np.degrees(np.arctan2(forward[1], np.hypot(forward[0], forward[2])))
+    return float(yaw), float(pitch)
+
+
+def iris_offsets(points):
+    """
+    Iris position relative to the eye corners, averaged over both eyes, in eye
+    widths: (x, y), positive right / down in the frame. points: (478, 3) landmarks.
+    """
+    offsets = []
+    for outer, inner, iris in (RIGHT_EYE, LEFT_EYE):
+        center = (points[outer, :2] + points[inner, :2]) / 2
+        width = np.linalg.norm(points[outer, :2] - points[inner, :2])
+        offsets.append((points[iris, :2] - center) / max(width, 1e-6))
+    return np.mean(offsets, axis=0)
+
+
+def poly_terms(features):
+    """(N, 2) features -> (N, 6) second order polynomial terms: 1, u, v, u², uv, v²"""
+    u, v = features[:, 0], features[:, 1]
+    return np.stack([np.ones_like(u), u, v, u * u, u * v, v * v], axis=1)
+
+
+class PoseCalibration:
+    """
+    Maps pose features (see HeadPosePointer.features) to a normalized screen
+    position with one second order polynomial per axis.
+
+    fit() solves it from calibration samples (ridge least squares on
+    standardized features); mapping a frame is then a single 6-term dot
+    product. Without a calibration a linear default is used: yaw_range /
+    pitch_range degrees of combined head + eye turn reach the screen edges.
+    """
+
+    def __init__(self, coef=None, mean=(0.0, 0.0), scale=(1.0, 1.0), yaw_range=20.0, pitch_range=15.0):
+        if coef is None:
+            coef = np.zeros((6, 2))
+            coef[0] = 0.5
+            coef[1, 0] = 0.5 / yaw_range
+            coef[2, 1] = 0.5 / pitch_range
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+
+    @classmethod
+    def fit(cls, features, targets, ridge=1e-3):
+        """features: (N, 2) samples, targets: (N, 2) normalized screen points they were looking at"""
+        features = np.asarray(features, dtype=np.float64)
+        mean = features.mean(axis=0)
+        scale = np.maximum(features.std(axis=0), 1e-6)
+        terms = poly_terms((features - mean) / scale)
+        penalty = ridge * len(terms) * np.eye(terms.shape[1])
+        penalty[0, 0] = 0 # Don't shrink the offset
+        coef = np.linalg.solve(terms.T @ terms + penalty, terms.T @ np.asarray(targets, dtype=np.float64))
+        return cls(coef, mean, scale)
+
+    def map(self, feature):
+        """Normalized (x, y) screen position for one (2,) feature, clipped to the screen"""
+        terms = poly_terms(((np.asarray(feature, dtype=np.float64) - self.mean) / self.scale)[None])
+        return np.clip(terms[0] @ self.coef, 0.0, 1.0)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"version": 1, "coef": self.coef.tolist(), "mean": self.mean.tolist(),
+                       "scale": self.scale.tolist()}, f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data["coef"], data["mean"], data["scale"])
+
+
+class HeadPosePointer:
+    """
+    Head pose cursor: yaw / pitch from the facial transformation matrix plus the
+    iris offsets (eye movement, iris_gain degrees per eye width), mapped to
+    the screen through a per-user PoseCalibration.
+
+    The calibration is loaded from calibration_path at startup when it exists.
+    start_calibration() shows the GRID targets one after the other; for each,
+    samples are taken for collect_ms once the user had settle_ms to look at it.
+    The fitted map is saved back to calibration_path.
+    """
+
+    def __init__(self, calibration_path=DEFAULT_CALIBRATION_PATH, iris_gain=120.0, settle_ms=800, collect_ms=700):
+        self.calibration_path = calibration_path
+        self.iris_gain = iris_gain
+        self.settle_ms = settle_ms
+        self.collect_ms = collect_ms
+
+        self.calibration = PoseCalibration()
+        self.calibrated = False
+        if calibration_path and os.path.exists(calibration_path):
+            try:
+                self.calibration = PoseCalibration.load(calibration_path)
+                self.calibrated = True
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Could not load head pose calibration {calibration_path}: {e}")
+
+        self.target_index = None # Index into GRID while calibrating
+        self._target_start = None
+        self._samples = []
+
+    @property
+    def calibrating(self):
+        return self.target_index is not None
+
+    def features(self, matrix, points):
+        """(2,) pose feature of a frame, or None without a usable matrix"""
+        angles = head_angles(matrix)
+        if angles is None:
+            return None
+        return np.asarray(angles) + self.iris_gain * iris_offsets(points)
+
+    def point(self, feature):
+        """Normalized (x, y) screen position the user points at"""
+        return self.calibration.map(feature)
+
+    def start_calibration(self):
+        self.target_index = 0
+        self._target_start = None
+        self._samples = []
+
+    def cancel_calibration(self):
+        self.target_index = None
+
+    def add_sample(self, feature, timestamp_ms):
+        """
+        Feeds one frame while calibrating. Returns True once the last target is
+        done (the new calibration is then active and saved).
+        """
+        if self._target_start is None:
+            self._target_start = timestamp_ms
+        elapsed = timestamp_ms - self._target_start
+        if elapsed >= self.settle_ms and feature is not None:
+            self._samples.append((self.target_index, feature))
+        if elapsed < self.settle_ms + self.collect_ms:
+            return False
+
+        # Next target
+        self.target_index += 1
+        self._target_start = None
+        if self.target_index < len(GRID):
+            return False
+        self.target_index = None
+
+        # One median feature per target: a glance away while collecting doesn't count
+        features = []
+        for i in range(len(GRID)):
+            samples = [f for index, f in self._samples if index == i]
+            if not samples:
+                print("Head pose calibration failed: face lost during calibration")
+                return True
+            features.append(np.median(samples, axis=0))
+        self.calibration = PoseCalibration.fit(features, GRID)
+        self.calibrated = True
+        if self.calibration_path:
+            try:
+                self.calibration.save(self.calibration_path)
+                print(f"Saved head pose calibration to {self.calibration_path}")
+            except OSError as e:
+                print(f"Could not save head pose calibration: {e}")
+        return True
@@ -0,0 +1,121 @@
+import threading
+from collections import deque
+
+
+class NullInputBackend:
+    """Backend that only counts calls (headless runs, benchmarks)"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def moveTo(self, x, y):
+        self.calls += 1
+
+    def mouseDown(self, button="left"):
+        self.calls += 1
+
+    def mouseUp(self, button="left"):
+        self.calls += 1
+
+    def click(self, button="left"):
+        self.calls += 1
+
+
+class InputDispatcher:
+    """
+    Sends mouse input to the OS on its own thread, so a slow desktop
+    (e.g. an X11 round-trip) never stalls the vision loop.
+
+    Consecutive cursor moves are merged: only the newest target of a run of
+    moves is sent. Button events are never merged or dropped and keep their
+    order relative to the moves around them.
+
+    Counters: depth (queued events), merged (moves replaced by a newer one),
+    dropped (moves discarded because the queue was full), sent.
+    """
+
+    def __init__(self, backend=None, max_pending=64):
+        # backend: anything with pyautogui's moveTo/mouseDown/mouseUp/click (default: pyautogui)
+        if backend is None:
+            import pyautogui as backend
+        self.backend = backend
+        self.max_pending = max_pending
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._running = True
+        self.merged = 0
+        self.dropped = 0
+        self.sent = 0
+
+        self._thread = threading.Thread(target=self._run, name="input-dispatcher", daemon=True)
+        self._thread.start()
+
+    # --- Called from the vision thread (never block) ---
+    def move_to(self, x, y):
+        with self._cond:
+            if self._queue and self._queue[-1][0] == "move":
+                self._queue[-1] = ("move", (x, y))
+                self.merged += 1
+            elif len(self._queue) >= self.max_pending:
+                self.dropped += 1
+                return
+            else:
+                self._queue.append(("move", (x, y)))
+            self._cond.notify()
+
+    def mouse_down(self, button="left"):
+        self._put(("down", button))
+
+    def mouse_up(self, button="left"):
+        self._put(("up", button))
+
+    def click(self, button="left"):
+        self._put(("click", button))
+
+    def _put(self, event):
+        with self._cond:
+            self._queue.append(event)
+            self._cond.notify()
+
+    @property
+    def depth(self):
+        return len(self._queue)
+
+    def stats(self):
+        return {"depth": self.depth, "merged": self.merged, "dropped": self.dropped, "sent": self.sent}
+
+    def stats_line(self):
+        """Short summary for the pipeline report"""
+        return f"input queue {self.depth} | merged {self.merged} | dropped {self.dropped}"
+
+    # --- Dispatcher thread ---
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._queue:
+                    self._cond.wait()
+                if not self._queue:
+                    return # Closed and drained
+                kind, arg = self._queue.popleft()
+
+            try:
+                if kind == "move":
+                    self.backend.moveTo(*arg)
+                elif kind == "down":
+                    self.backend.mouseDown(button=arg)
+                elif kind == "up":
+                    self.backend.mouseUp(button=arg)
+                elif kind == "click":
+                    self.backend.click(button=arg)
+                self.sent += 1
+            except Exception as e:
+                # e.g. pyautogui.FailSafeException; keep dispatching
+                print(f"Input error ({kind}): {e}")
+
+    def close(self, timeout=1.0):
+        """Sends what is still queued (button releases matter) and stops the thread"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._thread.join(timeout=timeout)
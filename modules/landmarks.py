@@ -0,0 +1,62 @@
+import numpy as np
+
+# MediaPipe hand landmark IDs
+WRIST = 0
+THUMB_TIP = 4
+INDEX_TIP = 8
+FINGER_TIPS = np.array([8, 12, 16, 20]) # Index, Middle, Ring, Pinky
+FINGER_PIPS = np.array([6, 10, 14, 18])
+
+
+def landmarks_to_array(landmarks):
+    """MediaPipe NormalizedLandmark list -> (N, 3) float32 array of normalized x, y, z"""
+    array = getattr(landmarks, "array", None) # Replayed lists are array-backed already
+    if array is not None:
+        return np.asarray(array, dtype=np.float32)
+    return np.array([(lm.x, lm.y, lm.z) for lm in landmarks], dtype=np.float32)
+
+
+def largest_face(face_landmarks):
+    """
+    Index of the biggest (closest) face of a result. The landmarker doesn't keep
+    faces in the same order between frames, so index 0 can jump between people.
+    """
+    def size(face):
+        xs = [face[i].x for i in (234, 454)] # Cheeks
+        ys = [face[i].y for i in (10, 152)] # Forehead, chin
+        return (max(xs) - min(xs)) * (max(ys) - min(ys))
+    return max(range(len(face_landmarks)), key=lambda i: size(face_landmarks[i]))
+
+
+def hands_to_array(hand_landmarks):
+    """All detected hands of a result -> (H, 21, 3) float32 array (H may be 0)"""
+    if not hand_landmarks:
+        return np.zeros((0, 21, 3), dtype=np.float32)
+    return np.stack([landmarks_to_array(hand) for hand in hand_landmarks])
+
+
+class HandFeatures:
+    """
+    Gesture features for every detected hand, computed in one batch from a
+    (H, 21, 3) landmark array:
+
+    wrist_dist: (H, 21) distance of every landmark to the wrist (normalized units)
+    tip_dist / pip_dist: (H, 4) fingertip / PIP distance to the wrist (index..pinky)
+    curl: (H, 4) tip_dist / pip_dist, below 1 means the finger is folded
+    folded: (H,) number of folded fingers (thumb excluded)
+    pinch: (H,) thumb tip to index tip distance in pixels
+    """
+
+    def __init__(self, points, w, h):
+        self.points = points
+        xy = points[:, :, :2]
+
+        # Distance check is rotation invariant-ish
+        self.wrist_dist = np.linalg.norm(xy - xy[:, WRIST:WRIST + 1], axis=2)
+        self.tip_dist = self.wrist_dist[:, FINGER_TIPS]
+        self.pip_dist = self.wrist_dist[:, FINGER_PIPS]
+        self.curl = self.tip_dist / np.maximum(self.pip_dist, 1e-6)
+        self.folded = np.count_nonzero(self.curl < 1.0, axis=1)
+
+        pinch_vec = (xy[:, INDEX_TIP] - xy[:, THUMB_TIP]) * np.array([w, h], dtype=np.float32)
+        self.pinch = np.linalg.norm(pinch_vec, axis=1)
@@ -0,0 +1,114 @@
+import cv2
+import numpy as np
+
+
+def binary_median(mask, ksize):
+    """
+    cv2.medianBlur for a 0/255 mask: the median of a window is a majority
+    vote, so counting with a box filter gives the same pixels. OpenCV's
+    median for ksize >= 7 is far slower than the box filter.
+    """
+    if ksize * ksize > 255:
+        return cv2.medianBlur(mask, ksize) # Count wouldn't fit in uint8
+    ones = cv2.threshold(mask, 127, 1, cv2.THRESH_BINARY)[1]
+    count = cv2.boxFilter(ones, -1, (ksize, ksize), normalize=False, borderType=cv2.BORDER_REPLICATE)
+    return cv2.threshold(count, ksize * ksize // 2, 255, cv2.THRESH_BINARY)[1]
+
+
+class MarkerTracker:
+    """
+    Finds the largest blob of the marker color (a ColorModel) and returns its
+    top-center point, the pen tip the drawing mode paints with.
+
+    Detection runs at `scale` of the full resolution and only inside a window
+    around the last blob; when the marker isn't found there, one full-frame
+    pass reacquires it. Every refresh_interval frames the full frame is
+    searched anyway, so a bigger blob elsewhere (the real marker coming into
+    view) still wins over a small one the window got stuck on.
+
+    The blob is then refined at full resolution inside its (small) bounding
+    box, with the original erode / dilate / median filtering, so the stroke
+    point is as precise as a full-frame search.
+    """
+
+    def __init__(self, model, min_area=1000, scale=0.5, margin=80, blur_size=13, refresh_interval=15):
+        self.model = model
+        self.min_area = min_area # Full-resolution pixels
+        self.scale = scale
+        self.margin = margin # Search window padding around the last blob (full-resolution pixels)
+        self.blur_size = blur_size
+        self.refresh_interval = refresh_interval
+        self.box = None # Last blob (x1, y1, x2, y2) in full-resolution pixels, None = lost
+        self._frames_since_full = 0
+
+        # Kernels are built once; the coarse pass shrinks the median blur with the image
+        self._kernel = np.ones((3, 3), np.uint8)
+        self._coarse_blur = max(3, int(blur_size * scale) | 1)
+
+    def set_model(self, model):
+        self.model = model
+        self.box = None
+
+    def _mask(self, bgr, blur_size):
+        mask = self.model.classify(bgr)
+        mask = cv2.erode(mask, self._kernel, iterations=1)
+        mask = cv2.dilate(mask, self._kernel, iterations=2)
+        return binary_median(mask, blur_size)
+
+    @staticmethod
+    def _largest(mask):
+        """(area, contour) of the biggest contour in one pass, or (0, None)"""
+        cnts, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not cnts:
+            return 0, None
+        areas = [cv2.contourArea(c) for c in cnts]
+        i = int(np.argmax(areas))
+        return areas[i], cnts[i]
+
+    def _search(self, frame, window):
+        """Coarse pass: (area, box) with both in full-resolution pixels, or None"""
+        x1, y1, x2, y2 = window
+        if x2 - x1 < 2 or y2 - y1 < 2:
+            return None # Last box is off a (resized) frame
+        region = frame[y1:y2, x1:x2]
+        if self.scale < 1.0:
+            size = (max(1, int((x2 - x1) * self.scale)), max(1, int((y2 - y1) * self.scale)))
+            region = cv2.resize(region, size, interpolation=cv2.INTER_NEAREST)
+        area, contour = self._largest(self._mask(region, self._coarse_blur))
+        if contour is None or area < self.min_area * self.scale * self.scale:
+            return None
+        bx, by, bw, bh = cv2.boundingRect(contour)
+        return area / (self.scale * self.scale), (
+            x1 + int(bx / self.scale), y1 + int(by / self.scale),
+            x1 + int(np.ceil((bx + bw) / self.scale)), y1 + int(np.ceil((by + bh) / self.scale)))
+
+    def _window(self, box, w, h, pad):
+        x1, y1, x2, y2 = box
+        return max(0, x1 - pad), max(0, y1 - pad), min(w, x2 + pad), min(h, y2 + pad)
+
+    def locate(self, frame):
+        """(x, y) pen point in full-resolution pixels, or None when no marker is visible"""
+        h, w = frame.shape[:2]
+        found = None
+        self._frames_since_full += 1
+        if self.box is not None:
+            found = self._search(frame, self._window(self.box, w, h, self.margin))
+        if found is None or self._frames_since_full >= self.refresh_interval:
+            self._frames_since_full = 0
+            full = self._search(frame, (0, 0, w, h)) # Reacquire / look for a bigger blob
+            if full is not None and (found is None or full[0] > found[0]):
+                found = full
+
+        if found is None:
+            self.box = None
+            return None
+
+        # Fine pass at full resolution; the padding keeps the median blur's border effects out
+        x1, y1, x2, y2 = self._window(found[1], w, h, self.blur_size + 4)
+        area, contour = self._largest(self._mask(frame[y1:y2, x1:x2], self.blur_size))
+        if contour is None or area <= self.min_area:
+            self.box = None
+            return None
+        bx, by, bw, bh = cv2.boundingRect(contour)
+        self.box = (x1 + bx, y1 + by, x1 + bx + bw, y1 + by + bh)
+        return x1 + bx + bw // 2, y1 + by
@@ -0,0 +1,200 @@
+import threading
+import time
+
+
+class ModeRegistry:
+    """
+    Builds modes (and shared resources such as the face service) the first time
+    they are needed instead of at startup.
+
+    - get(name) builds on first use and returns the cached instance afterwards.
+    - warm_up(names) builds modes on a background thread (e.g. while the menu shows).
+    - release_idle() unloads modes that have not been used for idle_timeout
+      seconds, and any resource no loaded mode depends on any more.
+    - activate(name) marks the selected mode: its instance gets activate() (once
+      built) and the previously selected one deactivate(), for modes that
+      only hold on to expensive settings while they are on screen.
+    """
+
+    def __init__(self, idle_timeout=None, default_order=()):
+        self.idle_timeout = idle_timeout # Seconds, None/0 keeps everything loaded
+        self.default_order = tuple(default_order) # Warm-up guess while there is no selection history
+        self._factories = {}
+        self._depends = {}
+        self._instances = {}
+        self._failed = {}
+        self._last_used = {}
+        self._use_counts = {}
+        self._locks = {}
+        self._building = set()
+        self._registry_lock = threading.Lock()
+        self._active = None # Selected mode
+        self._activated = None # Mode whose instance got activate() and not deactivate() yet
+        self._active_lock = threading.Lock()
+
+    def register(self, name, factory, depends=()):
+        """factory() -> instance. depends: names of resources the instance holds on to."""
+        self._factories[name] = factory
+        self._depends[name] = tuple(depends)
+        self._locks[name] = threading.Lock()
+
+    def get(self, name):
+        """Returns the instance, building it if needed (None if it failed to build)."""
+        instance = self._instances.get(name)
+        if instance is None:
+            instance = self._build(name)
+        if instance is not None:
+            self._last_used[name] = time.monotonic()
+        return instance
+
+    def get_nowait(self, name):
+        """Returns the instance if it is ready, otherwise starts a background build and returns None."""
+        if name in self._instances:
+            return self.get(name)
+        self.warm_up([name])
+        return None
+
+    def failed(self, name):
+        return name in self._failed
+
+    def mark_selected(self, name):
+        """Records that the user picked this mode (feeds likely_next)."""
+        self._use_counts[name] = self._use_counts.get(name, 0) + 1
+
+    def activate(self, name):
+        """Selects name (e.g. "MENU" for no mode): deactivates the previous mode, activates this one once it is built."""
+        self._active = name
+        self._sync_active()
+
+    def _sync_active(self):
+        with self._active_lock:
+            if self._activated is not None and self._activated != self._active:
+                instance = self._instances.get(self._activated)
+                self._call_hook(self._activated, instance, "deactivate")
+                self._activated = None
+            if self._activated is None and self._active in self._instances:
+                self._activated = self._active
+                self._call_hook(self._active, self._instances[self._active], "activate")
+
+    def _call_hook(self, name, instance, method):
+        hook = getattr(instance, method, None)
+        if hook is None:
+            return
+        try:
+            hook()
+        except Exception as e:
+            print(f"Error in {name}.{method}(): {e}")
+
+    def _build(self, name):
+        with self._locks[name]:
+            # Another thread (e.g. warm-up) may have finished it while we waited
+            if name in self._instances:
+                return self._instances[name]
+            if name in self._failed:
+                return None
+
+            with self._registry_lock:
+                self._building.add(name)
+            try:
+                # Dependencies are built (and touched) first so they count as in use
+                for dep in self._depends[name]:
+                    self.get(dep)
+
+                start = time.perf_counter()
+                instance = self._factories[name]()
+            except Exception as e:
+                print(f"Error initializing {name}: {e}")
+                self._failed[name] = e
+                return None
+            finally:
+                with self._registry_lock:
+                    self._building.discard(name)
+
+            print(f"Loaded {name} in {(time.perf_counter() - start) * 1000:.0f} ms")
+            with self._registry_lock:
+                self._instances[name] = instance
+            self._last_used[name] = time.monotonic()
+            self._sync_active() # Selected while it was building
+            return instance
+
+    def likely_next(self, count=2):
+        """Most frequently selected modes, best candidates for warm-up (default_order fills up the rest)."""
+        ranked = sorted(self._use_counts, key=self._use_counts.get, reverse=True)
+        ranked += [name for name in self.default_order if name not in ranked]
+        return ranked[:count]
+
+    def warm_up(self, names):
+        """Builds the given modes on a background thread. Returns the thread (or None)."""
+        with self._registry_lock:
+            # Names already being built (or queued on another warm-up thread) are skipped
+            pending = [n for n in names if n in self._factories and n not in self._instances
+                       and n not in self._failed and n not in self._building]
+            if not pending:
+                return None
+            self._building.update(pending)
+
+        def _run():
+            try:
+                for name in pending:
+                    self._build(name)
+            finally:
+                with self._registry_lock:
+                    self._building.difference_update(pending)
+
+        thread = threading.Thread(target=_run, name="mode-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def release_idle(self, keep=()):
+        """
+        Unloads idle modes. Must be called from the thread that uses the modes,
+        so nothing is closed while it is processing a frame.
+        """
+        # Don't pull a resource out from under a build in progress
+        if not self.idle_timeout or self._building:
+            return
+
+        now = time.monotonic()
+        required = set(keep)
+        for name in keep:
+            required.update(self._depends.get(name, ()))
+
+        resources = self._resources()
+        for name in list(self._instances):
+            if name in required or name in resources:
+                continue
+            if now - self._last_used.get(name, now) > self.idle_timeout:
+                self._unload(name)
+
+        # Resources go once no loaded instance depends on them
+        for name in resources:
+            if name in required or name not in self._instances:
+                continue
+            if not any(name in self._depends[other] for other in list(self._instances)):
+                self._unload(name)
+
+    def _resources(self):
+        return {dep for deps in self._depends.values() for dep in deps}
+
+    def _unload(self, name):
+        with self._locks[name]:
+            with self._registry_lock:
+                instance = self._instances.pop(name, None)
+            if instance is None:
+                return
+            with self._active_lock:
+                if self._activated == name:
+                    self._call_hook(name, instance, "deactivate")
+                    self._activated = None
+            if hasattr(instance, "close"):
+                try:
+                    instance.close()
+                except Exception as e:
+                    print(f"Error closing {name}: {e}")
+            print(f"Unloaded {name}")
+
+    def close_all(self):
+        # Modes first, then the resources they were using
+        resources = self._resources()
+        for name in [n for n in list(self._instances) if n not in resources] + list(resources):
+            self._unload(name)
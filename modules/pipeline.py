@@ -0,0 +1,293 @@
+import cv2
+import threading
+import time
+from collections import deque
+
+from modules.capture import FramePool
+from modules.frame_clock import FrameClock
+from modules.profiler import profiler as default_profiler
+
+
+class FramePacket:
+    """A captured frame travelling through the pipeline stages."""
+    __slots__ = ("frame_id", "image", "buffer", "timestamp_ms", "captured_at", "processed_at")
+
+    def __init__(self, frame_id, image, timestamp_ms, captured_at, buffer=None):
+        self.frame_id = frame_id
+        self.image = image
+        self.buffer = buffer # FramePool buffer behind image, returned once the frame is done
+        self.timestamp_ms = timestamp_ms # Capture time from FrameClock
+        self.captured_at = captured_at
+        self.processed_at = None
+
+
+class LatestFrameQueue:
+    """
+    Bounded queue where new items push out unread old ones (latest frame wins).
+    on_drop(item) is called for every item that is discarded unread.
+    """
+
+    def __init__(self, maxsize=1, on_drop=None):
+        self._items = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self._closed = False
+        self.on_drop = on_drop
+        self.dropped = 0
+
+    def _discard(self, items):
+        if self.on_drop:
+            for item in items:
+                self.on_drop(item)
+
+    def put(self, item):
+        stale = []
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+                stale.append(self._items.popleft())
+            self._items.append(item)
+            self._cond.notify()
+        self._discard(stale)
+
+    def get(self, timeout=None):
+        """Returns the newest item, or None on timeout / when closed and empty."""
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            item = self._items.pop()
+            # Anything older than what we return is stale by now
+            self.dropped += len(self._items)
+            stale = list(self._items)
+            self._items.clear()
+        self._discard(stale)
+        return item
+
+    def clear(self):
+        """Discards queued items without counting them as dropped"""
+        with self._cond:
+            stale = list(self._items)
+            self._items.clear()
+        self._discard(stale)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed
+
+
+class FramePipeline:
+    """
+    Staged capture -> inference -> render pipeline.
+
+    Capture and inference each run on their own thread and hand frames over
+    through LatestFrameQueue, so a slow stage drops stale frames instead of
+    building up a backlog. Rendering (imshow/waitKey) has to stay on the main
+    thread, so the caller pulls finished frames with next_frame().
+
+    pause() stops reading the camera altogether (e.g. while the menu shows)
+    and resume() picks up again. With reopen, the capture is released while
+    paused and reopen() is called to get a new one on resume.
+
+    Frames are read and mirrored into reused buffers (see FramePool), which go
+    back to the pool once rendered or dropped. pool_size=0 allocates every
+    frame instead.
+    """
+
+    STAGES = ("capture", "inference", "render", "end_to_end")
+
+    def __init__(self, cap, process_fn, clock=None, mirror=True, report_interval=5.0, reporters=(), profiler=None,
+                 reopen=None, idle_fn=None, pool_size=6):
+        self.cap = cap
+        self.process_fn = process_fn # process_fn(image, timestamp_ms, frame_id) -> image
+        self.clock = clock or FrameClock(cap)
+        self.mirror = mirror
+        self.report_interval = report_interval
+        self.reporters = list(reporters) # Callables returning extra text for the periodic report
+        self.reopen = reopen # () -> new capture, used to release the camera while paused
+        self.idle_fn = idle_fn # Called on the inference thread while no frames arrive
+
+        self.pool = FramePool(pool_size) if pool_size else None
+        self._raw = None # Capture thread's read buffer (mirror=True)
+        self._shape = None # Last frame shape, to pick pool buffers before reading
+
+        self.capture_queue = LatestFrameQueue(on_drop=self.recycle)
+        self.output_queue = LatestFrameQueue(on_drop=self.recycle)
+        self.stats = profiler or default_profiler # Stage timings (see modules/profiler.py)
+
+        self._running = False
+        self._active = threading.Event() # Cleared while paused
+        self._active.set()
+        self._threads = []
+        self._frame_id = 0
+        self._rendered = 0
+        self._last_report = time.perf_counter()
+        self._last_rendered_at = None
+        self.fps = 0.0 # Smoothed display rate, for the HUD
+
+    def start(self):
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self._inference_loop, name="inference", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+
+    def pause(self):
+        """Stops capture and inference until resume(). Frames in flight are discarded."""
+        self._active.clear()
+        self.capture_queue.clear()
+        self.output_queue.clear()
+
+    def resume(self):
+        self.output_queue.clear() # A frame that was mid-inference when paused
+        self._active.set()
+
+    @property
+    def paused(self):
+        return not self._active.is_set()
+
+    def stop(self):
+        self._running = False
+        self._active.set() # Wake a paused capture thread so it can exit
+        self.capture_queue.close()
+        self.output_queue.close()
+        for t in self._threads:
+            t.join(timeout=1.0)
+
+    @property
+    def running(self):
+        return self._running and not self.output_queue.closed
+
+    def _capture_loop(self):
+        while self._running:
+            if not self._active.is_set():
+                self._wait_while_paused()
+                continue
+
+            start = time.perf_counter()
+            # Mirrored: read into our own buffer and flip into a pool buffer.
+            # Otherwise read straight into a pool buffer (when the size is known).
+            buffer = None
+            if self.mirror or not self.pool:
+                ret, frame = self.cap.read(self._raw) if self.pool else self.cap.read()
+            else:
+                buffer = self.pool.acquire(self._shape) if self._shape else None
+                ret, frame = self.cap.read(buffer)
+            if not ret:
+                print("Camera stream ended.")
+                break
+            timestamp_ms = self.clock.stamp()
+            read_done = time.perf_counter()
+            self._shape = frame.shape
+            if buffer is not None and frame is not buffer:
+                self.pool.release(buffer) # Source allocated its own frame (e.g. image files)
+                buffer = None
+
+            if self.mirror:
+                if self.pool:
+                    self._raw = frame
+                    buffer = self.pool.acquire(frame.shape)
+                    frame = cv2.flip(frame, 1, dst=buffer)
+                else:
+                    frame = cv2.flip(frame, 1)
+
+            now = time.perf_counter()
+            self.stats.record("capture.read", (read_done - start) * 1000, start)
+            self.stats.record("capture.flip", (now - read_done) * 1000, read_done)
+            self.stats.record("capture", (now - start) * 1000)
+            self._frame_id += 1
+            self.capture_queue.put(FramePacket(self._frame_id, frame, timestamp_ms, now, buffer))
+
+        self.capture_queue.close()
+
+    def _wait_while_paused(self):
+        if self.reopen is not None and self.cap is not None:
+            self.cap.release() # Camera (and its LED) off until resumed
+            self.cap = None
+        self._active.wait()
+        if not self._running:
+            return
+
+        if self.cap is None:
+            self.cap = self.reopen()
+            self.clock.cap = self.cap
+        # Recorded sources would otherwise race to catch up with the paused time
+        restart_clock = getattr(self.cap, "restart_clock", None)
+        if restart_clock:
+            restart_clock()
+
+    def _inference_loop(self):
+        while self._running:
+            packet = self.capture_queue.get(timeout=0.5)
+            if packet is None:
+                if self.capture_queue.closed:
+                    break
+                if self.idle_fn:
+                    self.idle_fn()
+                continue
+            if not self._active.is_set():
+                self.recycle(packet)
+                continue # Captured just before pause()
+
+            start = time.perf_counter()
+            try:
+                packet.image = self.process_fn(packet.image, packet.timestamp_ms, packet.frame_id)
+            except Exception as e:
+                print(f"Runtime error in pipeline: {e}")
+            packet.processed_at = time.perf_counter()
+            self.stats.record("inference", (packet.processed_at - start) * 1000, start)
+            self.output_queue.put(packet)
+
+        self.output_queue.close()
+
+    def next_frame(self, timeout=0.5):
+        """Blocks until the newest processed frame is available (None on timeout)."""
+        return self.output_queue.get(timeout=timeout)
+
+    def recycle(self, packet):
+        """Returns the packet's buffer to the pool; its image must not be used afterwards"""
+        if packet.buffer is not None and self.pool:
+            self.pool.release(packet.buffer)
+            packet.buffer = None
+
+    def mark_rendered(self, packet, render_start):
+        """
+        Records render and end-to-end latency once a frame has been displayed,
+        and recycles its buffer (imshow keeps its own copy).
+        """
+        self.recycle(packet)
+        now = time.perf_counter()
+        self.stats.record("render", (now - render_start) * 1000, render_start)
+        self.stats.record("end_to_end", (now - packet.captured_at) * 1000)
+        self.stats.set_counter("dropped", self.dropped)
+        self._rendered += 1
+
+        if self._last_rendered_at is not None and now > self._last_rendered_at:
+            self.fps = 0.9 * self.fps + 0.1 / (now - self._last_rendered_at)
+        self._last_rendered_at = now
+
+        if self.report_interval and now - self._last_report >= self.report_interval:
+            self._report(now)
+
+    @property
+    def dropped(self):
+        return self.capture_queue.dropped + self.output_queue.dropped
+
+    def _report(self, now):
+        elapsed = now - self._last_report
+        fps = self._rendered / elapsed if elapsed > 0 else 0.0
+        averages = self.stats.averages()
+        stages = " | ".join(f"{stage} {averages[stage]:.1f}ms" for stage in self.STAGES if stage in averages)
+        dropped = self.dropped
+        extra = "".join(f" | {reporter()}" for reporter in self.reporters)
+        print(f"[pipeline] {fps:.1f} fps | {stages} | dropped {dropped}{extra}")
+
+        self._rendered = 0
+        self._last_report = now
@@ -0,0 +1,188 @@
+import csv
+import functools
+import json
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+
+class _Stage:
+    """Context manager returned by Profiler.stage()"""
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        self.profiler.record(self.name, (end - self.start) * 1000, self.start)
+        return False
+
+
+class Profiler:
+    """
+    Lightweight per-stage timing.
+
+        with profiler.stage("hand.detect"):
+            ...
+
+        @profiler.timed("drawing.process")
+        def process(self, frame): ...
+
+    Keeps the last `window` samples of every stage (mean / percentiles /
+    histogram), simple counters (e.g. dropped frames), and optionally a trace
+    of every timed call that export() writes as CSV, JSON or Chrome trace
+    (chrome://tracing, Perfetto).
+    """
+
+    def __init__(self, window=120, max_events=200000):
+        self.window = window
+        self.max_events = max_events
+        self.tracing = False
+        self._samples = {}
+        self._counters = {}
+        self._events = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def timed(self, name):
+        """Decorator version of stage()"""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with _Stage(self, name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, stage, ms, start=None):
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+            samples.append(ms)
+            if self.tracing:
+                if start is None:
+                    start = time.perf_counter() - ms / 1000
+                self._events.append((stage, threading.current_thread().name, start - self._origin, ms))
+
+    def set_counter(self, name, value):
+        with self._lock:
+            self._counters[name] = value
+
+    @property
+    def counters(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def averages(self):
+        with self._lock:
+            return {stage: sum(s) / len(s) for stage, s in self._samples.items() if s}
+
+    def summary(self):
+        """{stage: {"mean", "p50", "p95", "max", "count"}} over the rolling window"""
+        with self._lock:
+            snapshot = {stage: np.array(s) for stage, s in self._samples.items() if s}
+        return {
+            stage: {
+                "mean": float(s.mean()),
+                "p50": float(np.percentile(s, 50)),
+                "p95": float(np.percentile(s, 95)),
+                "max": float(s.max()),
+                "count": len(s),
+            }
+            for stage, s in snapshot.items()
+        }
+
+    def histogram(self, stage, bins=10):
+        """(counts, edges) of the rolling window of one stage"""
+        with self._lock:
+            samples = np.array(self._samples.get(stage, ()))
+        return np.histogram(samples, bins=bins)
+
+    # --- On-screen HUD ---
+    def draw_hud(self, frame, fps=None, stages=None, origin=(10, 130)):
+        """Draws fps, counters and per-stage averages on the frame (top-left, below the mode's own text)"""
+        averages = self.averages()
+        lines = []
+        if fps is not None:
+            lines.append(f"FPS {fps:.1f}")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name} {value}")
+        for stage in stages or sorted(averages):
+            if stage in averages:
+                lines.append(f"{stage} {averages[stage]:.1f} ms")
+
+        x, y = origin
+        height = 18 * len(lines) + 8
+        overlay = frame[y:y + height, x:x + 260]
+        # Darken the area behind the text so it stays readable on any background
+        overlay[:] = (overlay * 0.4).astype(frame.dtype)
+        for i, line in enumerate(lines):
+            cv2.putText(frame, line, (x + 6, y + 18 * (i + 1)), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1)
+        return frame
+
+    # --- Export ---
+    def events(self):
+        with self._lock:
+            return list(self._events)
+
+    def export(self, path, fmt=None):
+        """
+        fmt: "csv" (one row per timed call), "json" (summary, histograms + calls) or
+        "chrome" (Chrome trace event format). Defaults from the file extension,
+        .json files get the Chrome format.
+        """
+        if fmt is None:
+            fmt = "csv" if path.endswith(".csv") else "chrome"
+        events = self.events()
+
+        if fmt == "csv":
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["stage", "thread", "start_ms", "duration_ms"])
+                for stage, thread, start, ms in events:
+                    writer.writerow([stage, thread, f"{start * 1000:.3f}", f"{ms:.3f}"])
+        elif fmt == "json":
+            summary = self.summary()
+            histograms = {}
+            for stage in summary:
+                counts, edges = self.histogram(stage)
+                histograms[stage] = {"counts": counts.tolist(), "edges_ms": edges.tolist()}
+            with open(path, "w") as f:
+                json.dump({
+                    "summary": summary,
+                    "histograms": histograms,
+                    "counters": self.counters,
+                    "events": [{"stage": s, "thread": t, "start_ms": start * 1000, "duration_ms": ms}
+                               for s, t, start, ms in events],
+                }, f, indent=1)
+        elif fmt == "chrome":
+            threads = {}
+            trace = []
+            for stage, thread, start, ms in events:
+                tid = threads.setdefault(thread, len(threads) + 1)
+                trace.append({"name": stage, "ph": "X", "pid": 1, "tid": tid,
+                              "ts": round(start * 1e6, 1), "dur": round(ms * 1000, 1)})
+            for thread, tid in threads.items():
+                trace.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": thread}})
+            with open(path, "w") as f:
+                json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+        else:
+            raise ValueError(f"Unknown trace format '{fmt}', expected csv, json or chrome")
+        return len(events)
+
+
+# Shared instance used by the pipeline and every mode
+profiler = Profiler()
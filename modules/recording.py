@@ -0,0 +1,276 @@
+import json
+import os
+
+import numpy as np
+
+from modules.landmarks import largest_face
+
+# File layout: MAGIC, uint32 header length, JSON header padded with spaces to
+# HEADER_SIZE bytes, then one FRAME_DTYPE record per frame (read back with np.memmap).
+MAGIC = b"GSTLMK01"
+HEADER_SIZE = 4096
+MAX_HANDS = 2
+HAND_POINTS = 21
+FACE_POINTS = 478
+NUM_BLENDSHAPES = 52
+HANDEDNESS = ("Left", "Right")
+
+FRAME_DTYPE = np.dtype([
+    ("timestamp_ms", "<i8"),
+    ("frame_id", "<i8"),
+    ("num_hands", "u1"),
+    ("handedness", "u1", (MAX_HANDS,)), # Index into HANDEDNESS
+    ("handedness_score", "<f4", (MAX_HANDS,)),
+    ("hand_landmarks", "<f4", (MAX_HANDS, HAND_POINTS, 3)),
+    ("face_valid", "u1"), # 1 if face inference ran on this frame
+    ("num_faces", "u1"),
+    ("face_landmarks", "<f4", (FACE_POINTS, 3)),
+    ("blendshapes", "<f4", (NUM_BLENDSHAPES,)),
+    ("face_matrix", "<f4", (4, 4)),
+])
+
+
+class LandmarkRecorder:
+    """
+    Writes hand / face landmarker results to a compact binary recording.
+
+    Hand and face results for the same frame_id are merged into one record;
+    a record is written when the next frame starts (or on close()).
+    Only the first face is kept, which is all the hand / eye logic uses.
+    """
+
+    def __init__(self, path, frame_size):
+        self.path = path
+        self.frames = 0
+        self._blendshape_names = None
+        self._row = None
+        self._frame_size = tuple(int(v) for v in frame_size)
+        self._file = open(path, "wb")
+        self._write_header() # Rewritten on close() once the blendshape names are known
+
+    def _write_header(self):
+        header = json.dumps({
+            "version": 1,
+            "frame_size": self._frame_size,
+            "blendshapes": self._blendshape_names or [],
+        }).encode()
+        length = HEADER_SIZE - len(MAGIC) - 4
+        self._file.seek(0)
+        self._file.write(MAGIC + np.uint32(length).tobytes() + header.ljust(length))
+
+    def _row_for(self, timestamp_ms, frame_id):
+        if self._row is not None and self._row["frame_id"] != frame_id:
+            self._flush()
+        if self._row is None:
+            self._row = np.zeros((), dtype=FRAME_DTYPE)
+            self._row["timestamp_ms"] = timestamp_ms
+            self._row["frame_id"] = frame_id
+        return self._row
+
+    def record_hands(self, timestamp_ms, frame_id, result):
+        row = self._row_for(timestamp_ms, frame_id)
+        if not result:
+            return
+        hands = result.hand_landmarks[:MAX_HANDS]
+        row["num_hands"] = len(hands)
+        for i, landmarks in enumerate(hands):
+            row["hand_landmarks"][i] = [(lm.x, lm.y, lm.z) for lm in landmarks]
+            category = result.handedness[i][0]
+            row["handedness"][i] = HANDEDNESS.index(category.category_name)
+            row["handedness_score"][i] = category.score
+
+    def record_face(self, timestamp_ms, frame_id, result):
+        row = self._row_for(timestamp_ms, frame_id)
+        row["face_valid"] = 1
+        if not result or not result.face_landmarks:
+            return
+        # Only the user's face is kept: the closest one, as the modes pick it
+        face = largest_face(result.face_landmarks)
+        row["num_faces"] = 1
+        row["face_landmarks"] = [(lm.x, lm.y, lm.z) for lm in result.face_landmarks[face]]
+        if result.face_blendshapes:
+            blendshapes = result.face_blendshapes[face]
+            if self._blendshape_names is None:
+                self._blendshape_names = [c.category_name for c in blendshapes]
+            row["blendshapes"] = [c.score for c in blendshapes]
+        if result.facial_transformation_matrixes:
+            row["face_matrix"] = result.facial_transformation_matrixes[face]
+
+    def _flush(self):
+        self._file.write(self._row.tobytes())
+        self.frames += 1
+        self._row = None
+
+    def close(self):
+        if self._row is not None:
+            self._flush()
+        self._write_header()
+        self._file.close()
+
+
+# --- Replay ---
+class ReplayLandmark:
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, x, y, z):
+        self.x, self.y, self.z = x, y, z
+
+
+class ReplayLandmarkList:
+    """Read-only landmark list backed by an (N, 3) array (see landmarks_to_array)"""
+
+    def __init__(self, array):
+        self.array = array
+
+    def __len__(self):
+        return len(self.array)
+
+    def __getitem__(self, i):
+        x, y, z = self.array[i]
+        return ReplayLandmark(float(x), float(y), float(z))
+
+    def __iter__(self):
+        for i in range(len(self.array)):
+            yield self[i]
+
+
+class ReplayCategory:
+    __slots__ = ("category_name", "score", "index")
+
+    def __init__(self, category_name, score, index=0):
+        self.category_name = category_name
+        self.score = score
+        self.index = index
+
+
+class ReplayHandResult:
+    """Stands in for a HandLandmarkerResult"""
+
+    def __init__(self, row):
+        n = int(row["num_hands"])
+        self.hand_landmarks = [ReplayLandmarkList(row["hand_landmarks"][i]) for i in range(n)]
+        self.handedness = [[ReplayCategory(HANDEDNESS[row["handedness"][i]], float(row["handedness_score"][i]))]
+                           for i in range(n)]
+
+
+class ReplayFaceResult:
+    """Stands in for a FaceLandmarkerResult (first face only)"""
+
+    def __init__(self, row, blendshape_names):
+        has_face = bool(row["num_faces"])
+        self.face_landmarks = [ReplayLandmarkList(row["face_landmarks"])] if has_face else []
+        self.facial_transformation_matrixes = [np.array(row["face_matrix"])] if has_face else []
+        self._row = row
+        self._names = blendshape_names
+
+    @property
+    def face_blendshapes(self):
+        if not self.face_landmarks or not self._names:
+            return []
+        scores = self._row["blendshapes"]
+        return [[ReplayCategory(name, float(scores[i]), i) for i, name in enumerate(self._names)]]
+
+
+class LandmarkRecording:
+    """
+    A recording opened with np.memmap: frames[i] is a FRAME_DTYPE record.
+
+    For replay, pass hand_landmarker() / face_service() to a mode instead of
+    the real MediaPipe objects and call seek(i) before processing frame i
+    (see replay()). No inference runs.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a landmark recording")
+            header_len = int(np.frombuffer(f.read(4), dtype="<u4")[0])
+            header = json.loads(f.read(header_len).decode().strip())
+        offset = len(MAGIC) + 4 + header_len
+        self.path = path
+        self.frame_size = tuple(header["frame_size"])
+        self.blendshape_names = header["blendshapes"]
+
+        data_size = os.path.getsize(path) - offset
+        count = data_size // FRAME_DTYPE.itemsize
+        if count:
+            self.frames = np.memmap(path, dtype=FRAME_DTYPE, mode="r", offset=offset, shape=(count,))
+        else:
+            self.frames = np.zeros(0, dtype=FRAME_DTYPE)
+        self.index = 0
+
+        # Row of the newest face inference at or before each frame (gaze checks skip frames)
+        rows = np.arange(len(self.frames))
+        self._face_rows = np.maximum.accumulate(np.where(self.frames["face_valid"] > 0, rows, 0)) if len(rows) else rows
+
+    def __len__(self):
+        return len(self.frames)
+
+    def seek(self, index):
+        self.index = index
+
+    @property
+    def row(self):
+        return self.frames[self.index]
+
+    def hand_result(self):
+        return ReplayHandResult(self.row)
+
+    def face_result(self):
+        """Face result of the current frame, or of the last frame face inference ran on"""
+        return ReplayFaceResult(self.frames[self._face_rows[self.index]], self.blendshape_names)
+
+    def hand_landmarker(self):
+        return _ReplayHandLandmarker(self)
+
+    def face_service(self):
+        return _ReplayFaceService(self)
+
+
+class _ReplayHandLandmarker:
+    """Drop-in for HandLandmarker (VIDEO mode) returning the recorded result"""
+    replay = True # Modes skip building the MediaPipe input image
+
+    def __init__(self, recording):
+        self.recording = recording
+
+    def detect_for_video(self, image, timestamp_ms):
+        return self.recording.hand_result()
+
+    def close(self):
+        pass
+
+
+class _ReplayFaceService:
+    """Drop-in for FaceInferenceService returning the recorded result"""
+    replay = True
+
+    def __init__(self, recording):
+        self.recording = recording
+        self.recorder = None
+
+    def detect(self, mp_image, timestamp_ms, frame_id=None):
+        return self.recording.face_result()
+
+    def require(self, blendshapes=False, transformation_matrixes=False, num_faces=None):
+        pass # Whatever was recorded is all there is
+
+    def release(self, blendshapes=False, transformation_matrixes=False, num_faces=None):
+        pass
+
+    def close(self):
+        pass
+
+
+def replay(recording, mode, frame=None):
+    """
+    Runs mode.process() over every recorded frame on a blank image (or a copy
+    of frame) with the recorded timestamps. Yields each processed frame.
+    """
+    if frame is None:
+        w, h = recording.frame_size
+        frame = np.zeros((h, w, 3), dtype=np.uint8)
+    for i in range(len(recording)):
+        recording.seek(i)
+        row = recording.frames[i]
+        yield mode.process(frame.copy(), int(row["timestamp_ms"]), int(row["frame_id"]))
@@ -0,0 +1,179 @@
+import cv2
+import numpy as np
+import time
+from collections import OrderedDict
+
+
+class AdaptiveResolution:
+    """
+    Lowers the inference input scale while inference runs over budget and
+    raises it again once there is headroom.
+    """
+
+    def __init__(self, budget_ms=33, scales=(1.0, 0.75, 0.5, 0.35), cooldown=10):
+        self.budget_ms = budget_ms
+        self.scales = scales
+        self.cooldown = cooldown # Frames to wait between changes
+        self.level = 0
+        self.avg_ms = None
+        self._frames_since_change = 0
+
+    @property
+    def scale(self):
+        return self.scales[self.level]
+
+    def update(self, elapsed_ms):
+        """Feeds one inference time and adjusts the scale if needed."""
+        self.avg_ms = elapsed_ms if self.avg_ms is None else 0.8 * self.avg_ms + 0.2 * elapsed_ms
+        self._frames_since_change += 1
+        if self._frames_since_change < self.cooldown:
+            return
+
+        if self.avg_ms > self.budget_ms and self.level < len(self.scales) - 1:
+            self.level += 1
+            self._frames_since_change = 0
+        elif self.avg_ms < self.budget_ms * 0.5 and self.level > 0:
+            self.level -= 1
+            self._frames_since_change = 0
+
+    def apply(self, image):
+        if self.scale >= 1.0:
+            return image
+        h, w = image.shape[:2]
+        size = (max(1, int(w * self.scale)), max(1, int(h * self.scale)))
+        return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+class RoiTracker:
+    """
+    Crops the inference input to a window around the previous detections.
+
+    prepare() returns the (cropped, possibly downscaled) image to send to the
+    landmarker; finish() maps the resulting landmarks back to full-frame
+    normalized coordinates in place and decides the window for the next frame.
+    Both take a key (the landmarker timestamp) so LIVE_STREAM results that
+    come back later are still mapped with the crop they were made from.
+
+    MediaPipe's VIDEO/LIVE_STREAM tracking carries its own ROI from frame to
+    frame in normalized image coordinates, so every time the window moves the
+    landmarker misses one frame while it re-detects. The window therefore only
+    moves when the landmarks get near its edge (or it has become much too big),
+    and finish() reports such misses so the caller can keep its last result.
+
+    A full-frame pass runs when tracking is really lost, and every
+    refresh_interval frames while fewer than max_objects are tracked so new
+    hands/faces entering the view are still picked up.
+    """
+
+    def __init__(self, margin=0.3, min_size=0.25, max_objects=1, refresh_interval=90, budget_ms=None):
+        self.margin = margin # Extra space around the landmarks, relative to their box size
+        self.min_size = min_size # Smallest window, as a fraction of the frame
+        self.max_objects = max_objects
+        self.refresh_interval = refresh_interval
+        self.resolution = AdaptiveResolution(budget_ms) if budget_ms else None
+
+        self.box = None # Window for the next frame: (x1, y1, x2, y2) normalized, None = full frame
+        self._window = None # Window used for the last prepared frame
+        self._missing_objects = True
+        self._frames_since_full = 0
+        self._pending = OrderedDict() # key -> (region, frame size, submit time, window moved)
+
+    def prepare(self, rgb, key):
+        h, w = rgb.shape[:2]
+
+        window = self.box
+        self._frames_since_full += 1
+        if window is not None and self._missing_objects and self._frames_since_full >= self.refresh_interval:
+            window = None
+        if window is None:
+            self._frames_since_full = 0
+
+        moved = window != self._window
+        self._window = window
+
+        if window is None:
+            region = (0, 0, w, h)
+        else:
+            x1, y1, x2, y2 = window
+            x0, y0 = int(x1 * w), int(y1 * h)
+            region = (x0, y0, max(1, int(x2 * w) - x0), max(1, int(y2 * h) - y0))
+
+        x0, y0, cw, ch = region
+        image = rgb[y0:y0 + ch, x0:x0 + cw]
+        if self.resolution:
+            image = self.resolution.apply(image)
+
+        self._pending[key] = (region, (w, h), time.perf_counter(), moved)
+        while len(self._pending) > 8:
+            self._pending.popitem(last=False)
+
+        # mp.Image needs a contiguous buffer
+        return np.ascontiguousarray(image)
+
+    def finish(self, landmark_lists, key):
+        """
+        landmark_lists: e.g. result.hand_landmarks / result.face_landmarks (modified in place).
+        Returns False if an empty result is just the miss caused by moving the
+        window; the caller should keep using its previous result for this frame.
+        """
+        entry = self._pending.pop(key, None)
+        if entry is None:
+            return True
+        (x0, y0, cw, ch), (w, h), submitted, moved = entry
+
+        if self.resolution:
+            self.resolution.update((time.perf_counter() - submitted) * 1000)
+
+        if not landmark_lists:
+            if moved:
+                return False # Retry the same window; the landmarker re-detects inside it
+            self.box = None # Really lost: next frame gets a full-frame pass
+            self._missing_objects = True
+            return True
+
+        sx, sy = cw / w, ch / h
+        ox, oy = x0 / w, y0 / h
+        cropped = (x0, y0, cw, ch) != (0, 0, w, h)
+        xs, ys = [], []
+        for landmarks in landmark_lists:
+            for lm in landmarks:
+                if cropped:
+                    lm.x = lm.x * sx + ox
+                    lm.y = lm.y * sy + oy
+                    lm.z = lm.z * sx # z shares x's scale
+                xs.append(lm.x)
+                ys.append(lm.y)
+
+        self._missing_objects = len(landmark_lists) < self.max_objects
+        bbox = (min(xs), min(ys), max(xs), max(ys))
+        wanted = self._expand(*bbox)
+        if self.box is None or wanted is None or not self._fits(bbox, self.box) or self._area(self.box) > 2.5 * self._area(wanted):
+            self.box = wanted
+        return True
+
+    def _expand(self, x1, y1, x2, y2):
+        pad = self.margin * max(x2 - x1, y2 - y1)
+        x1, x2 = self._grow(x1 - pad, x2 + pad)
+        y1, y2 = self._grow(y1 - pad, y2 + pad)
+        x1, y1, x2, y2 = max(0.0, x1), max(0.0, y1), min(1.0, x2), min(1.0, y2)
+
+        # Landmarks (mostly) outside the frame: fall back to a full-frame pass
+        if x2 - x1 < 0.05 or y2 - y1 < 0.05:
+            return None
+        return (x1, y1, x2, y2)
+
+    def _grow(self, lo, hi):
+        """Keeps a minimum size so fast motion doesn't leave the window"""
+        grow = max(0.0, self.min_size - (hi - lo)) / 2
+        return lo - grow, hi + grow
+
+    def _fits(self, bbox, window):
+        """True if the landmarks are inside the window with some room to move (window edges at the frame border don't count)"""
+        room = 0.1 * max(window[2] - window[0], window[3] - window[1])
+        x1, y1, x2, y2 = bbox
+        wx1, wy1, wx2, wy2 = window
+        return ((x1 - wx1 > room or wx1 <= 0.0) and (y1 - wy1 > room or wy1 <= 0.0)
+                and (wx2 - x2 > room or wx2 >= 1.0) and (wy2 - y2 > room or wy2 >= 1.0))
+
+    def _area(self, box):
+        return (box[2] - box[0]) * (box[3] - box[1])
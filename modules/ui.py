@@ -0,0 +1,84 @@
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+class Sprite:
+    """
+    A pre-rendered overlay, cropped to the area that was actually drawn.
+
+    Built from the same drawing rendered on black and on white: where they
+    agree the overlay is opaque, where they differ by 255 it is transparent,
+    and anything in between is an anti-aliased edge. composite() is one copy
+    of the opaque pixels plus a blend of the (few) edge pixels.
+    """
+
+    def __init__(self, on_black, on_white):
+        alpha = 255 - cv2.absdiff(on_white, on_black).max(axis=2)
+        x, y, w, h = cv2.boundingRect(alpha)
+        self.box = (x, y, x + w, y + h)
+        self.bgr = np.ascontiguousarray(on_black[y:y + h, x:x + w])
+        alpha = alpha[y:y + h, x:x + w]
+        self.mask = np.where(alpha == 255, 255, 0).astype(np.uint8)
+        self.opaque = bool(alpha.size) and bool(alpha.min() == 255)
+
+        # Edge pixels: on_black is premultiplied, out = bgr + frame * (1 - alpha)
+        self.edges = np.nonzero((alpha > 0) & (alpha < 255))
+        self.edge_bgr = self.bgr[self.edges].astype(np.float32)
+        self.edge_keep = (1.0 - alpha[self.edges] / 255.0).astype(np.float32)[:, None]
+
+    def composite(self, frame):
+        x1, y1, x2, y2 = self.box
+        if x2 <= x1 or y2 <= y1:
+            return frame
+        view = frame[y1:y2, x1:x2]
+        if self.opaque:
+            view[:] = self.bgr
+            return frame
+        cv2.copyTo(self.bgr, self.mask, view)
+        if len(self.edges[0]):
+            blended = self.edge_bgr + view[self.edges] * self.edge_keep
+            view[self.edges] = np.clip(blended + 0.5, 0, 255).astype(np.uint8)
+        return frame
+
+
+class OverlayCache:
+    """
+    Renders static overlays once into sprites and reuses them.
+
+        overlays.draw(frame, ("header", selected), self._render_header)
+
+    render_fn(canvas) draws on a (h, w, 3) canvas in frame coordinates, exactly
+    like it would on the frame itself. The key should hold every piece of
+    state the overlay depends on (the frame size is added automatically), so a
+    new key is all it takes to invalidate a sprite.
+    """
+
+    def __init__(self, max_sprites=16):
+        self.max_sprites = max_sprites
+        self._sprites = OrderedDict()
+
+    def get(self, key, size, render_fn):
+        w, h = size
+        full_key = (key, w, h)
+        sprite = self._sprites.get(full_key)
+        if sprite is None:
+            on_black = np.zeros((h, w, 3), dtype=np.uint8)
+            on_white = np.full((h, w, 3), 255, dtype=np.uint8)
+            render_fn(on_black)
+            render_fn(on_white)
+            sprite = self._sprites[full_key] = Sprite(on_black, on_white)
+            while len(self._sprites) > self.max_sprites:
+                self._sprites.popitem(last=False)
+        else:
+            self._sprites.move_to_end(full_key)
+        return sprite
+
+    def draw(self, frame, key, render_fn):
+        """get() + composite() for an overlay the size of frame"""
+        h, w = frame.shape[:2]
+        return self.get(key, (w, h), render_fn).composite(frame)
+
+    def clear(self):
+        self._sprites.clear()
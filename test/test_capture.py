@@ -0,0 +1,46 @@
+import numpy as np
+
+from modules.capture import FramePool
+from modules.pipeline import FramePacket, LatestFrameQueue
+
+
+def test_on_drop_sees_every_discarded_item():
+    discarded = []
+    queue = LatestFrameQueue(maxsize=2, on_drop=discarded.append)
+    for i in range(4):
+        queue.put(i) # Pushes out 0 and 1
+    assert queue.get(timeout=0) == 3 # Discards 2
+    queue.put(4)
+    queue.clear() # Discards 4, not counted as dropped
+    assert discarded == [0, 1, 2, 4]
+    assert queue.dropped == 3
+
+
+def test_frame_pool_reuses_buffers():
+    pool = FramePool(size=2)
+    a = pool.acquire((4, 4, 3))
+    b = pool.acquire((4, 4, 3))
+    assert pool.allocated == 2
+    pool.release(a)
+    assert pool.acquire((4, 4, 3)) is a
+    c = pool.acquire((4, 4, 3)) # All in flight: a new one
+    assert pool.allocated == 3 and c is not b
+
+
+def test_frame_pool_drops_old_size():
+    pool = FramePool(size=1)
+    a = pool.acquire((4, 4, 3))
+    pool.acquire((8, 8, 3))
+    pool.release(a) # Old size: not kept
+    assert pool.acquire((8, 8, 3)).shape == (8, 8, 3)
+    assert pool.allocated == 3
+
+
+def test_recycled_packets_return_to_pool():
+    pool = FramePool(size=1)
+    buffer = pool.acquire((2, 2, 3))
+    packet = FramePacket(1, buffer, 0, 0.0, buffer)
+    queue = LatestFrameQueue(on_drop=lambda p: pool.release(p.buffer))
+    queue.put(packet)
+    queue.put(FramePacket(2, np.zeros((2, 2, 3), np.uint8), 33, 0.0))
+    assert pool.acquire((2, 2, 3)) is buffer
@@ -0,0 +1,38 @@
+import cv2
+import numpy as np
+
+from modules.color_model import ColorModel
+
+
+def random_image(seed=0, size=(120, 160)):
+    return np.random.default_rng(seed).integers(0, 256, (*size, 3), dtype=np.uint8)
+
+
+def test_hsv_range_matches_inrange():
+    image = random_image()
+    lower, upper = np.array([100, 120, 50]), np.array([130, 255, 255])
+    expected = cv2.inRange(cv2.cvtColor(image, cv2.COLOR_BGR2HSV), lower, upper)
+    np.testing.assert_array_equal(ColorModel.from_hsv_range(lower, upper).classify(image), expected)
+
+
+def test_patch_model_finds_its_color():
+    rng = np.random.default_rng(1)
+    blue = np.clip(np.array([200, 60, 30]) + rng.normal(0, 6, (15, 15, 3)), 0, 255).astype(np.uint8)
+    model = ColorModel.from_patch(blue)
+
+    image = np.zeros((60, 90, 3), dtype=np.uint8)
+    image[:, :30] = (200, 60, 30) # Same blue
+    image[:, 30:60] = (30, 200, 60) # Green
+    image[:, 60:] = (40, 40, 220) # Red
+    mask = model.classify(image)
+    assert mask.dtype == np.uint8 and mask.shape == image.shape[:2]
+    assert np.all(mask[:, :30] == 255)
+    assert not mask[:, 30:].any()
+
+
+def test_red_patch_across_hue_wrap():
+    # Red sits at both ends of OpenCV's 0..180 hue range
+    reds = np.array([[[20, 20, 220], [30, 10, 230]]], dtype=np.uint8).repeat(8, axis=0)
+    model = ColorModel.from_patch(reds)
+    image = np.array([[[25, 15, 225], [200, 60, 30]]], dtype=np.uint8)
+    np.testing.assert_array_equal(model.classify(image)[0], [255, 0])
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from modules.face_tracker import FaceTracker, box_iou
+
+
+def test_box_iou():
+    iou = box_iou([(0, 0, 10, 10)], [(0, 0, 10, 10), (5, 0, 15, 10), (20, 20, 30, 30)])
+    np.testing.assert_allclose(iou, [[1.0, 1 / 3, 0.0]], atol=1e-6)
+
+
+def test_ids_follow_faces_when_order_changes():
+    tracker = FaceTracker()
+    a, b = (0, 0, 100, 100), (200, 0, 300, 100)
+    assert tracker.update([a, b]) == [1, 2]
+    assert tracker.update([b, a]) == [2, 1]
+    # Small moves keep the ID
+    assert tracker.update([(205, 2, 305, 102), (3, 0, 103, 100)]) == [2, 1]
+
+
+def test_new_face_gets_new_id():
+    tracker = FaceTracker()
+    tracker.update([(0, 0, 100, 100)])
+    assert tracker.update([(0, 0, 100, 100), (400, 0, 500, 100)]) == [1, 2]
+
+
+def test_track_survives_short_gap():
+    tracker = FaceTracker(max_missing=3)
+    tracker.update([(0, 0, 100, 100)])
+    for _ in range(3):
+        tracker.update([])
+    assert tracker.update([(0, 0, 100, 100)]) == [1]
+
+
+def test_track_expires_after_long_gap():
+    tracker = FaceTracker(max_missing=3)
+    tracker.update([(0, 0, 100, 100)])
+    for _ in range(4):
+        tracker.update([])
+    assert tracker.update([(0, 0, 100, 100)]) == [2]
+
+
+@pytest.mark.parametrize("boxes", [[], np.zeros((0, 4))])
+def test_empty_frame(boxes):
+    assert FaceTracker().update(boxes) == []
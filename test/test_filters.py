@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from modules.filters import KalmanFilter, OneEuroFilter, make_filter
+
+
+def test_one_euro_first_sample_passes_through():
+    f = OneEuroFilter()
+    np.testing.assert_array_equal(f(np.array([1.0, 2.0]), 0), [1.0, 2.0])
+
+
+def test_one_euro_smooths_jitter_and_converges():
+    f = OneEuroFilter(min_cutoff=1.0, beta=0.0)
+    rng = np.random.default_rng(0)
+    noisy = 5.0 + rng.normal(0, 0.5, 300)
+    out = np.array([f(np.array([x]), i * 33)[0] for i, x in enumerate(noisy)])
+    assert np.std(out[100:]) < 0.3 * np.std(noisy[100:])
+    assert np.mean(out[100:]) == pytest.approx(5.0, abs=0.2)
+
+
+def test_one_euro_beta_reduces_lag():
+    ramp = np.arange(60, dtype=np.float64) * 10
+    slow, fast = OneEuroFilter(beta=0.0), OneEuroFilter(beta=1.0)
+    lag_slow = ramp[-1] - [slow(np.array([x]), i * 33) for i, x in enumerate(ramp)][-1][0]
+    lag_fast = ramp[-1] - [fast(np.array([x]), i * 33) for i, x in enumerate(ramp)][-1][0]
+    assert lag_fast < lag_slow / 5
+
+
+def test_repeated_timestamp_returns_last_value():
+    for f in (OneEuroFilter(), KalmanFilter()):
+        f(np.array([0.0]), 0)
+        first = f(np.array([1.0]), 33)
+        np.testing.assert_array_equal(f(np.array([5.0]), 33), first)
+
+
+def test_kalman_tracks_constant_velocity():
+    f = KalmanFilter(process_noise=1.0, measurement_noise=1e-4)
+    for i in range(100):
+        out = f(np.array([0.01 * i, -0.02 * i]), i * 33)
+    np.testing.assert_allclose(out, [0.99, -1.98], atol=1e-2)
+
+
+def test_reset():
+    f = OneEuroFilter()
+    f(np.array([0.0]), 0)
+    f.reset()
+    np.testing.assert_array_equal(f(np.array([7.0]), 10), [7.0])
+
+
+def test_make_filter():
+    assert make_filter(None) is None
+    assert make_filter("none") is None
+    assert isinstance(make_filter("kalman"), KalmanFilter)
+    f = make_filter({"type": "one_euro", "min_cutoff": 0.3, "beta": 0.005})
+    assert isinstance(f, OneEuroFilter) and f.min_cutoff == 0.3
+
+
+def test_two_hands_with_same_label_get_their_own_filter():
+    hand_control = pytest.importorskip("modules.hand_control")
+    mode = hand_control.HandControlMode.__new__(hand_control.HandControlMode) # No models needed
+    mode.filters = {"landmarks": {"type": "one_euro"}}
+    mode._landmark_filters = {}
+    mode.timestamp_ms = 0
+    a, b = np.zeros((21, 3), np.float32), np.ones((21, 3), np.float32)
+    points = np.stack([a, b])
+    mode._filter_landmarks(points, ["Right", "Right"])
+    np.testing.assert_array_equal(points[0], a)
+    np.testing.assert_array_equal(points[1], b)
+    assert len(mode._landmark_filters) == 2
+
+    # One of them leaves: its filter goes, the other keeps filtering
+    mode.timestamp_ms = 33
+    mode._filter_landmarks(points[:1], ["Right"])
+    assert list(mode._landmark_filters) == [("Right", 0)]
@@ -0,0 +1,20 @@
+from modules.frame_clock import FrameClock
+
+
+def test_monotonic_keeps_capture_stamps():
+    clock = FrameClock()
+    assert clock.monotonic(100, -1) == 100
+    assert clock.monotonic(133.7, 100) == 133
+
+
+def test_monotonic_never_repeats_or_goes_back():
+    clock = FrameClock()
+    assert clock.monotonic(100, 100) == 101
+    assert clock.monotonic(50, 100) == 101
+
+
+def test_monotonic_stamps_missing_timestamps():
+    clock = FrameClock()
+    first = clock.monotonic(None, -1)
+    assert first >= 0
+    assert clock.monotonic(None, first) > first
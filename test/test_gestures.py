@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from modules.gestures import Gesture, GestureEngine, HAND_FEATURES, feature_names, feature_vector
+from modules.landmarks import HandFeatures
+
+NAMES = feature_names()
+
+
+def vector(**values):
+    """Feature vector with both hands present and the given "slot.feature" values"""
+    v = np.zeros(len(NAMES), dtype=np.float32)
+    v[NAMES.index("mouse.present")] = 1
+    v[NAMES.index("click.present")] = 1
+    for name, value in values.items():
+        v[NAMES.index(name.replace("__", "."))] = value
+    return v
+
+
+def test_down_hold_up():
+    engine = GestureEngine([Gesture("pinch", {"click.pinch": (None, 30)})])
+    assert engine.update(vector(click__pinch=20), 0) == [("pinch", "down")]
+    assert engine.update(vector(click__pinch=20), 33) == [("pinch", "hold")]
+    assert engine.update(vector(click__pinch=50), 66) == [("pinch", "up")]
+    assert engine.update(vector(click__pinch=50), 99) == []
+
+
+def test_hold_time():
+    engine = GestureEngine([Gesture("fists", {"mouse.folded": (3, None)}, hold_ms=500)])
+    assert engine.update(vector(mouse__folded=4), 0) == []
+    assert engine.is_matched("fists") and not engine.is_active("fists")
+    assert engine.progress("fists", 250) == pytest.approx(0.5)
+    assert engine.update(vector(mouse__folded=4), 400) == []
+    assert engine.update(vector(mouse__folded=4), 500) == [("fists", "down")]
+
+
+def test_hold_time_restarts_after_a_gap():
+    engine = GestureEngine([Gesture("fists", {"mouse.folded": (3, None)}, hold_ms=500)])
+    engine.update(vector(mouse__folded=4), 0)
+    engine.update(vector(mouse__folded=0), 300)
+    assert engine.update(vector(mouse__folded=4), 600) == []
+    assert engine.update(vector(mouse__folded=4), 1100) == [("fists", "down")]
+
+
+def test_hysteresis_keeps_gesture_at_threshold():
+    engine = GestureEngine([Gesture("pinch", {"click.pinch": (None, 30)})]) # Default pinch margin: 5
+    engine.update(vector(click__pinch=29), 0)
+    assert engine.update(vector(click__pinch=34), 33) == [("pinch", "hold")]
+    assert engine.update(vector(click__pinch=36), 66) == [("pinch", "up")]
+    # Not matched anymore: the tight bound applies again
+    assert engine.update(vector(click__pinch=32), 99) == []
+
+
+def test_missing_hand_never_matches():
+    engine = GestureEngine([Gesture("pinch", {"click.pinch": (None, 30)})])
+    features = HandFeatures(np.zeros((1, 21, 3), dtype=np.float32), 640, 480)
+    v = feature_vector(features, {"mouse": 0, "click": None})
+    assert v[NAMES.index("click.present")] == 0
+    assert np.isnan(v[NAMES.index("click.pinch")])
+    assert engine.update(v, 0) == []
+
+
+def test_feature_vector_layout():
+    points = np.random.default_rng(0).random((2, 21, 3)).astype(np.float32)
+    features = HandFeatures(points, 640, 480)
+    v = feature_vector(features, {"mouse": 1, "click": 0})
+    base = len(HAND_FEATURES)
+    assert v[0] == 1 and v[base] == 1
+    np.testing.assert_allclose(v[1:5], features.curl[1])
+    assert v[base + 6] == pytest.approx(features.pinch[0])
+
+
+def test_unknown_feature():
+    with pytest.raises(ValueError):
+        GestureEngine([Gesture("bad", {"click.nope": (0, 1)})])
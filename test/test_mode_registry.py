@@ -0,0 +1,68 @@
+import threading
+import time
+
+from modules.mode_registry import ModeRegistry
+
+
+def test_get_nowait_builds_once():
+    builds = []
+    release = threading.Event()
+
+    def factory():
+        builds.append(1)
+        release.wait(5)
+        return object()
+
+    registry = ModeRegistry()
+    registry.register("A", factory)
+    # Polled every frame while the build runs: only one builder thread
+    for _ in range(20):
+        assert registry.get_nowait("A") is None
+    release.set()
+    for _ in range(100):
+        if registry.get_nowait("A") is not None:
+            break
+        time.sleep(0.01)
+    assert registry.get_nowait("A") is not None
+    assert len(builds) == 1
+    assert not registry._building
+
+
+class Mode:
+    def __init__(self):
+        self.calls = []
+
+    def activate(self):
+        self.calls.append("activate")
+
+    def deactivate(self):
+        self.calls.append("deactivate")
+
+
+def test_activate_hooks_follow_selection():
+    registry = ModeRegistry()
+    registry.register("A", Mode)
+    registry.register("B", Mode)
+    registry.warm_up(["A", "B"]).join()
+    a, b = registry.get("A"), registry.get("B")
+    assert a.calls == [] # Warm-up alone doesn't activate
+
+    registry.activate("A")
+    registry.activate("B")
+    registry.activate("MENU") # Not a registered mode: just deactivates B
+    assert a.calls == ["activate", "deactivate"]
+    assert b.calls == ["activate", "deactivate"]
+
+
+def test_mode_selected_while_building_is_activated_once_built():
+    release = threading.Event()
+    registry = ModeRegistry()
+    registry.register("A", lambda: release.wait(5) and Mode())
+    registry.activate("A")
+    assert registry.get_nowait("A") is None
+    release.set()
+    a = registry.get("A")
+    assert a.calls == ["activate"]
+
+    registry.close_all() # Closing the selected mode deactivates it first
+    assert a.calls == ["activate", "deactivate"]
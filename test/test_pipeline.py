@@ -0,0 +1,24 @@
+from modules.pipeline import LatestFrameQueue
+
+
+def test_latest_frame_wins():
+    queue = LatestFrameQueue(maxsize=1)
+    for i in range(3):
+        queue.put(i)
+    assert queue.get(timeout=0) == 2
+    assert queue.dropped == 2
+    assert queue.get(timeout=0) is None
+
+
+def test_get_drops_older_items():
+    queue = LatestFrameQueue(maxsize=3)
+    for i in range(3):
+        queue.put(i)
+    assert queue.get(timeout=0) == 2
+    assert queue.dropped == 2
+
+
+def test_closed_queue_returns_none():
+    queue = LatestFrameQueue()
+    queue.close()
+    assert queue.closed and queue.get(timeout=1) is None
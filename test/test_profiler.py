@@ -0,0 +1,22 @@
+import json
+
+from modules.profiler import Profiler
+
+
+def test_json_export_has_summary_and_histograms(tmp_path):
+    profiler = Profiler()
+    profiler.tracing = True
+    for ms in (1.0, 2.0, 2.0, 9.0):
+        profiler.record("hand.detect", ms)
+    profiler.set_counter("dropped", 3)
+
+    path = str(tmp_path / "trace.json")
+    assert profiler.export(path, "json") == 4
+    with open(path) as f:
+        data = json.load(f)
+    assert data["summary"]["hand.detect"]["count"] == 4
+    histogram = data["histograms"]["hand.detect"]
+    assert sum(histogram["counts"]) == 4
+    assert histogram["edges_ms"][0] == 1.0 and histogram["edges_ms"][-1] == 9.0
+    assert data["counters"] == {"dropped": 3}
+    assert len(data["events"]) == 4
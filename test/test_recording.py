@@ -0,0 +1,89 @@
+import numpy as np
+
+from modules.recording import (FACE_POINTS, HAND_POINTS, LandmarkRecorder, LandmarkRecording, ReplayCategory,
+                               ReplayLandmarkList)
+
+
+class HandResult:
+    def __init__(self, hands, labels):
+        self.hand_landmarks = [ReplayLandmarkList(h) for h in hands]
+        self.handedness = [[ReplayCategory(label, 0.9)] for label in labels]
+
+
+class FaceResult:
+    def __init__(self, points, scores, matrix):
+        # One face, or lists of per-face values
+        if not isinstance(matrix, list):
+            points, scores, matrix = [points], [scores], [matrix]
+        self.face_landmarks = [ReplayLandmarkList(p) for p in points]
+        self.face_blendshapes = [[ReplayCategory(f"shape{i}", float(s), i) for i, s in enumerate(face)]
+                                 for face in scores]
+        self.facial_transformation_matrixes = matrix
+
+
+def test_round_trip(tmp_path):
+    rng = np.random.default_rng(0)
+    hands = rng.random((2, HAND_POINTS, 3)).astype(np.float32)
+    face = rng.random((FACE_POINTS, 3)).astype(np.float32)
+    scores = rng.random(52).astype(np.float32)
+    matrix = rng.random((4, 4)).astype(np.float32)
+
+    path = str(tmp_path / "session.lmk")
+    recorder = LandmarkRecorder(path, (640, 480))
+    recorder.record_hands(0, 1, HandResult(hands, ["Left", "Right"]))
+    recorder.record_face(0, 1, FaceResult(face, scores, matrix))
+    recorder.record_hands(33, 2, HandResult(hands[:1], ["Right"])) # No face inference on frame 2
+    recorder.close()
+    assert recorder.frames == 2
+
+    recording = LandmarkRecording(path)
+    assert len(recording) == 2
+    assert recording.frame_size == (640, 480)
+    assert recording.blendshape_names == [f"shape{i}" for i in range(52)]
+    np.testing.assert_array_equal(recording.frames["timestamp_ms"], [0, 33])
+
+    recording.seek(0)
+    hand_result = recording.hand_result()
+    assert [h[0].category_name for h in hand_result.handedness] == ["Left", "Right"]
+    np.testing.assert_array_equal(hand_result.hand_landmarks[1].array, hands[1])
+    face_result = recording.face_result()
+    np.testing.assert_array_equal(face_result.face_landmarks[0].array, face)
+    np.testing.assert_allclose([c.score for c in face_result.face_blendshapes[0]], scores)
+    np.testing.assert_array_equal(face_result.facial_transformation_matrixes[0], matrix)
+
+    # Frames without face inference replay the last face result
+    recording.seek(1)
+    assert len(recording.hand_result().hand_landmarks) == 1
+    np.testing.assert_array_equal(recording.face_result().face_landmarks[0].array, face)
+
+
+def test_no_face(tmp_path):
+    path = str(tmp_path / "empty.lmk")
+    recorder = LandmarkRecorder(path, (640, 480))
+    recorder.record_face(0, 1, None)
+    recorder.close()
+
+    recording = LandmarkRecording(path)
+    recording.seek(0)
+    result = recording.face_result()
+    assert result.face_landmarks == [] and result.face_blendshapes == []
+
+
+def test_records_the_largest_face(tmp_path):
+    rng = np.random.default_rng(1)
+    small = (0.45 + 0.1 * rng.random((FACE_POINTS, 3))).astype(np.float32)
+    large = rng.random((FACE_POINTS, 3)).astype(np.float32)
+    scores = rng.random((2, 52)).astype(np.float32)
+    matrixes = [np.full((4, 4), 1, np.float32), np.full((4, 4), 2, np.float32)]
+
+    path = str(tmp_path / "two_faces.lmk")
+    recorder = LandmarkRecorder(path, (640, 480))
+    recorder.record_face(0, 1, FaceResult([small, large], scores, matrixes))
+    recorder.close()
+
+    recording = LandmarkRecording(path)
+    recording.seek(0)
+    result = recording.face_result()
+    np.testing.assert_array_equal(result.face_landmarks[0].array, large)
+    np.testing.assert_allclose([c.score for c in result.face_blendshapes[0]], scores[1])
+    np.testing.assert_array_equal(result.facial_transformation_matrixes[0], matrixes[1])
@@ -0,0 +1,199 @@
+"""
+Headless benchmark: runs each mode over a recorded video / image sequence
+without windows or OS input and prints fps and per-frame latency as JSON.
+
+    python tools/benchmark.py --source images/example.mkv
+    python tools/benchmark.py --source frames/ --modes CONTROL EYE_CONTROL --frames 300
+    python tools/benchmark.py --recording session.lmk --modes CONTROL EYE_CONTROL
+
+With --recording, hand / eye control replay landmarks saved by
+`main.py --record` instead of running inference, so gesture thresholds and
+filters can be tuned at thousands of frames per second.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import types
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+
+def install_stub_pyautogui():
+    """Build boxes have no display: the modes get a pyautogui that does nothing"""
+    stub = types.ModuleType("pyautogui")
+    stub.PAUSE = 0
+    stub.FAILSAFE = False
+    stub.FailSafeException = type("FailSafeException", (Exception,), {})
+    stub.size = lambda: (1920, 1080)
+    stub.moveTo = stub.mouseDown = stub.mouseUp = stub.click = lambda *args, **kwargs: None
+    sys.modules["pyautogui"] = stub
+
+
+install_stub_pyautogui()
+
+from modules.frame_clock import FrameClock
+from modules.frame_source import open_source
+from modules.input_dispatcher import InputDispatcher, NullInputBackend
+from modules.recording import LandmarkRecording, replay
+
+MODES = ("DRAWING", "CONTROL", "EYE_CONTROL", "FACE_DETECTION")
+
+
+def build_mode(name, input_dispatcher, recording=None):
+    """recording: LandmarkRecording to replay instead of running the landmarkers"""
+    replay_kwargs = {}
+    if recording is not None:
+        if name not in ("CONTROL", "EYE_CONTROL"):
+            raise ValueError(f"{name} can't replay landmarks, it needs video")
+        replay_kwargs["face_service"] = recording.face_service()
+
+    if name == "DRAWING":
+        from modules.drawing import DrawingMode
+        return DrawingMode()
+    if name == "CONTROL":
+        from modules.hand_control import HandControlMode
+        if recording is not None:
+            replay_kwargs["hand_landmarker"] = recording.hand_landmarker()
+        return HandControlMode(input_dispatcher=input_dispatcher, **replay_kwargs)
+    if name == "EYE_CONTROL":
+        from modules.eye_control import EyeControlMode
+        return EyeControlMode(input_dispatcher=input_dispatcher, **replay_kwargs)
+    if name == "FACE_DETECTION":
+        from modules.face_detection import FaceDetectionMode
+        return FaceDetectionMode()
+    raise ValueError(f"Unknown mode {name}")
+
+
+def run_mode(name, args):
+    source = open_source(args.source, realtime=args.realtime)
+    if not source.isOpened():
+        return {"error": f"Could not open {args.source}"}
+
+    input_dispatcher = InputDispatcher(backend=NullInputBackend())
+    try:
+        mode = build_mode(name, input_dispatcher)
+    except Exception as e:
+        source.release()
+        input_dispatcher.close()
+        return {"error": str(e)}
+
+    clock = FrameClock(source)
+    latencies = []
+    frames = 0
+    start = time.perf_counter() if args.warmup <= 0 else None # Set after the warm-up frames otherwise
+    while args.frames <= 0 or frames < args.frames + args.warmup:
+        ret, frame = source.read()
+        if not ret:
+            break
+        timestamp_ms = clock.stamp()
+        frame = cv2.flip(frame, 1) # Same mirrored input as the app
+
+        t0 = time.perf_counter()
+        if name == "DRAWING":
+            mode.process(frame)
+        else:
+            mode.process(frame, timestamp_ms, frames)
+        t1 = time.perf_counter()
+
+        frames += 1
+        if frames == args.warmup:
+            start = t1 # Model warm-up isn't part of the measurement
+        elif frames > args.warmup:
+            latencies.append((t1 - t0) * 1000)
+
+    elapsed = time.perf_counter() - start if start is not None else 0.0
+    if hasattr(mode, "close"):
+        mode.close()
+    input_dispatcher.close()
+    source.release()
+
+    return summarize(latencies, elapsed, input_dispatcher)
+
+
+def run_replay(name, args):
+    recording = LandmarkRecording(args.recording)
+    input_dispatcher = InputDispatcher(backend=NullInputBackend())
+    try:
+        mode = build_mode(name, input_dispatcher, recording)
+    except Exception as e:
+        input_dispatcher.close()
+        return {"error": str(e)}
+
+    latencies = []
+    start = time.perf_counter() if args.warmup <= 0 else None
+    frames = replay(recording, mode)
+    count = 0
+    while args.frames <= 0 or count < args.frames + args.warmup:
+        t0 = time.perf_counter()
+        if next(frames, None) is None:
+            break
+        t1 = time.perf_counter()
+        count += 1
+        if count == args.warmup:
+            start = t1
+        elif count > args.warmup:
+            latencies.append((t1 - t0) * 1000)
+
+    elapsed = time.perf_counter() - start if start is not None else 0.0
+    mode.close()
+    input_dispatcher.close()
+    return summarize(latencies, elapsed, input_dispatcher)
+
+
+def summarize(latencies, elapsed, input_dispatcher):
+    if not latencies:
+        return {"error": "No frames measured (source shorter than --warmup?)"}
+    latencies = np.array(latencies)
+    return {
+        "frames": len(latencies),
+        "fps": round(len(latencies) / elapsed, 2) if elapsed > 0 else None,
+        "latency_ms": {
+            "mean": round(float(latencies.mean()), 2),
+            "p50": round(float(np.percentile(latencies, 50)), 2),
+            "p95": round(float(np.percentile(latencies, 95)), 2),
+            "p99": round(float(np.percentile(latencies, 99)), 2),
+            "max": round(float(latencies.max()), 2),
+        },
+        "input_events": input_dispatcher.stats(),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Headless mode benchmark")
+    parser.add_argument("--source", default=os.path.join(ROOT, "images", "example.mkv"),
+                        help="Video file or image directory/glob")
+    parser.add_argument("--recording", help="Replay a landmark recording (main.py --record) instead of a video")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    parser.add_argument("--frames", type=int, default=0, help="Frames to measure per mode (0 = whole source)")
+    parser.add_argument("--warmup", type=int, default=5, help="Frames to skip before measuring")
+    parser.add_argument("--realtime", action="store_true", help="Replay at native speed instead of as fast as possible")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.recording:
+        report = {"recording": args.recording, "modes": {}}
+        for name in args.modes:
+            report["modes"][name] = run_replay(name, args)
+    else:
+        report = {"source": args.source, "realtime": args.realtime, "modes": {}}
+        for name in args.modes:
+            report["modes"][name] = run_mode(name, args)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()